@@ -0,0 +1,139 @@
+import random
+import threading
+from functools import lru_cache
+from multiprocessing.managers import BaseManager
+
+# Fibonacci compute engine
+#
+# fibonacci_performance.py submits the same naive fibonacci(30) 500 times. This module
+# offers three kernels and a result cache shared across processes:
+# - naive:    exponential-time recursion, kept as the GIL stress test
+# - memo:     recursion memoized with functools.lru_cache (private to each process)
+# - doubling: O(log n) fast doubling, F(2k) = F(k) * (2F(k+1) - F(k)),
+#             F(2k+1) = F(k)^2 + F(k+1)^2
+# SharedResultCache lives in a manager process, so thread and process pool workers
+# all see the same results. It counts hits and misses, which shows how much of a
+# duplicate-heavy task stream is saved by caching versus by parallelism.
+
+
+def fib_naive(n):
+    if n <= 1:
+        return n
+    return fib_naive(n - 1) + fib_naive(n - 2)
+
+
+@lru_cache(maxsize=4096)
+def _fib_memo(n):
+    if n <= 1:
+        return n
+    return _fib_memo(n - 1) + _fib_memo(n - 2)
+
+
+def fib_memo(n):
+    # fill the cache from below so the recursion depth stays bounded for large n
+    for k in range(0, n, 200):
+        _fib_memo(k)
+    return _fib_memo(n)
+
+
+# forget the memoized values of the calling process (thread pools share the parent's)
+def clear_memo():
+    _fib_memo.cache_clear()
+
+
+def fib_doubling(n):
+    a, b = 0, 1                      # F(k), F(k+1) for k = the bits of n read so far
+    for bit in bin(n)[2:]:
+        a, b = a * (2 * b - a), a * a + b * b
+        if bit == "1":
+            a, b = b, a + b
+    return a
+
+
+KERNELS = {"naive": fib_naive, "memo": fib_memo, "doubling": fib_doubling}
+
+
+class ResultCache:
+
+    def __init__(self):
+        self._values = {}
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()    # the manager serves every connection in its own thread
+
+    # (True, value) on a hit, (False, None) on a miss
+    def get(self, key):
+        with self._lock:
+            if key in self._values:
+                self._hits += 1
+                return True, self._values[key]
+            self._misses += 1
+            return False, None
+
+    def put(self, key, value):
+        with self._lock:
+            self._values[key] = value
+
+    def stats(self):
+        with self._lock:
+            total = self._hits + self._misses
+            return {"hits": self._hits, "misses": self._misses, "entries": len(self._values),
+                    "hit_rate": self._hits / total if total else 0.0}
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+            self._hits = self._misses = 0
+
+
+class _CacheManager(BaseManager):
+    pass
+
+
+_CacheManager.register("ResultCache", ResultCache)
+
+
+# starts a manager process holding one ResultCache; the proxy can be passed to pool workers
+class SharedResultCache:
+
+    def __init__(self):
+        self._manager = _CacheManager()
+        self._manager.start()
+        self.proxy = self._manager.ResultCache()
+
+    def stats(self):
+        return self.proxy.stats()
+
+    def clear(self):
+        self.proxy.clear()
+
+    def shutdown(self):
+        self._manager.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+
+
+# one task: fibonacci(n) with the given kernel, looked up in / stored to the shared cache
+def fib_task(n, kernel="naive", cache=None):
+    if cache is not None:
+        hit, value = cache.get((kernel, n))
+        if hit:
+            return value
+    value = KERNELS[kernel](n)
+    if cache is not None:
+        cache.put((kernel, n), value)
+    return value
+
+
+# duplicate-heavy task stream: n drawn from `distinct` values around `base`, Zipf-skewed
+# so a few values repeat very often
+def task_stream(task_num, base=30, distinct=8, skew=1.2, seed=0):
+    rng = random.Random(seed)
+    values = [base - distinct // 2 + i for i in range(distinct)]
+    weights = [1 / (rank + 1) ** skew for rank in range(distinct)]
+    rng.shuffle(values)
+    return rng.choices(values, weights, k=task_num)
@@ -1,57 +1,75 @@
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
-import time
-import psutil
-
-# Fibonacci function
-def fibonacci(n):
-    if n <= 1:
-        return n
-    return fibonacci(n-1) + fibonacci(n-2)
-
-# get the performance metrics
-# runtime, throughput, cpu, memory
-# executor_type: ThreadPoolExecutor or ProcessPoolExecutor
-def performance(executor_type, num_workers, task_num):
-    start_time = time.time()
-    process = psutil.Process()  
-    initial_memory = process.memory_info().rss  
-
-    execute(executor_type, num_workers, task_num)
-    end_time = time.time()
-    final_memory = process.memory_info().rss  
-    runtime = end_time - start_time
-    throughput = task_num / runtime
-    mem = final_memory - initial_memory
-
-    return runtime, throughput, mem
-
-def execute(executor, num_workers, task_num):
-    with executor(max_workers=num_workers) as executor:
-        futures = [executor.submit(fibonacci, 30) for _ in range(task_num)]
-        results = [future.result() for future in futures]
-        cpu_usage = psutil.cpu_percent(interval=0)
-    return cpu_usage
-
-def main():
-    task_num = 500  # number of tasks
-    num_workers = 4  # number of threads/processes
-
-    print("ThreadPoolExecutor:")
-    thread_time, thread_throughput, thread_mem = performance(ThreadPoolExecutor, num_workers, task_num)
-    thread_cpu = execute(ThreadPoolExecutor, num_workers, task_num)
-    print(f"Execution Time: {thread_time:.4f} s")
-    print(f"Throughput: {thread_throughput:.4f} tasks/s")
-    print(f"CPU usage: {thread_cpu:.2f}%")
-    print(f"Memory usage: {thread_mem / (1024 ** 2):.2f} MB\n")
-
-    print("ProcessPoolExecutor:")
-    process_time, process_throughput, process_mem = performance(ProcessPoolExecutor, num_workers, task_num)
-    process_cpu = execute(ProcessPoolExecutor, num_workers, task_num)
-    print(f"Execution Time: {process_time:.4f} s")
-    print(f"Throughput: {process_throughput:.4f} tasks/s")
-    print(f"CPU usage: {process_cpu:.2f}%")
-    print(f"Memory usage: {process_mem / (1024 ** 2):.2f} MB\n")
-
-
-if __name__ == "__main__":
-    main()
\ No newline at end of file
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from Executors.adaptive import AdaptiveThreadPoolExecutor
+from Executors.bounded import BoundedExecutor
+from Executors.warm_pool import WarmPoolManager
+from Harness.benchmark import run_benchmark, run_once, summarize, print_results, save_results
+# Fibonacci function: the naive recursion from fib_engine, which has no third-party
+# imports and can therefore also run in subinterpreters
+from fib_engine import SharedResultCache, clear_memo, fib_task, task_stream
+from fib_engine import fib_naive as fibonacci
+
+# workload registry: name -> (function, list of argument tuples)
+def workloads(task_num):
+    return {"fibonacci": (fibonacci, [(30,)] * task_num)}
+
+# caching vs parallelism on a duplicate-heavy stream: every kernel without a cache, and
+# the naive kernel behind the cross-process shared cache. Caches are cleared before
+# every run (warm-up included) so each run starts cold; hit/miss counts are per run.
+def compare_caching(stream, executor_types, num_workers=4, repeats=3, warmup=1):
+    configs = [("naive", False), ("memo", False), ("doubling", False), ("naive", True)]
+    results = []
+    with SharedResultCache() as shared:
+        for kernel, use_cache in configs:
+            inputs = [(n, kernel, shared.proxy if use_cache else None) for n in stream]
+            name = f"fib_{kernel}" + ("_shared_cache" if use_cache else "")
+            for executor_type in executor_types:
+                wall_ns, latencies_ns, cache_stats = [], [], []
+                for i in range(warmup + repeats):
+                    shared.clear()
+                    clear_memo()
+                    run = run_once(executor_type, num_workers, fib_task, inputs)
+                    if i < warmup:
+                        continue
+                    wall_ns.append(run["wall_ns"])
+                    latencies_ns.extend(run["latencies_ns"])
+                    cache_stats.append(shared.stats())
+                record = summarize(name, executor_type, num_workers, len(inputs), wall_ns, latencies_ns, warmup)
+                record["distinct_inputs"] = len(set(stream))
+                if use_cache:
+                    record["cache_hits"] = cache_stats[-1]["hits"]
+                    record["cache_misses"] = cache_stats[-1]["misses"]
+                    record["cache_hit_rate"] = cache_stats[-1]["hit_rate"]
+                results.append(record)
+    return results
+
+def main():
+    task_num = 500  # number of tasks
+    num_workers = 4  # number of threads/processes
+
+    # for AdaptiveThreadPoolExecutor num_workers is the upper bound of the pool size
+    # BoundedExecutor blocks submit() once 2 * num_workers tasks are pending
+    executors = (ThreadPoolExecutor, ProcessPoolExecutor, AdaptiveThreadPoolExecutor, BoundedExecutor)
+    # warm pools: each pool's start-up is reported once instead of inside every runtime
+    with WarmPoolManager() as manager:
+        results = run_benchmark(workloads(task_num), executors,
+                                pool_sizes=(num_workers,), repeats=3, warmup=1, instrument=True,
+                                monitor_interval=0.05, pool_manager=manager)
+    print_results(results)
+    save_results(results, "results/fibonacci")
+
+    # duplicate-heavy stream: n in 26..33, Zipf-skewed
+    caching = compare_caching(task_stream(task_num), (ThreadPoolExecutor, ProcessPoolExecutor), num_workers)
+    print_results(caching)
+    for r in caching:
+        if "cache_hits" in r:
+            print(f"{r['workload']} | {r['executor']}: {r['cache_hits']} hits, {r['cache_misses']} misses "
+                  f"(hit rate {r['cache_hit_rate']:.1%}, {r['distinct_inputs']} distinct inputs)")
+    save_results(caching, "results/fibonacci_caching")
+
+
+if __name__ == "__main__":
+    main()
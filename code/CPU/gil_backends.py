@@ -0,0 +1,92 @@
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from Executors.interpreters import backends, backend_name, runtime, start_workers
+from Executors.warm_pool import WarmPoolManager
+from Harness.benchmark import run_benchmark, print_results, save_results
+from Harness.monitor import ResourceMonitor
+from fib_engine import fib_naive
+from native_kernels import add_speedup, print_scaling
+from prime import generate_numbers
+from pure_kernels import is_prime
+
+# GIL-bound CPU workloads on GIL-free backends
+#
+# Runs fibonacci and is_prime on the thread pool, the process pool and, when this
+# Python has them, subinterpreters (InterpreterPoolExecutor, 3.14+) or free-threaded
+# threads (GIL disabled), see Executors/interpreters.py. Besides throughput and
+# speedup over one worker it reports, per backend and pool size:
+# - worker_startup_s: pool construction until every worker has run a task
+# - memory_per_worker_mb: growth of the process tree's PSS (RSS where PSS is not
+#   available) after the workers started, divided by the number of workers
+# The task functions come from fib_engine / pure_kernels, which subinterpreters can import.
+
+
+def _tree_memory():
+    sample = ResourceMonitor().start().stop().samples[-1]
+    return sample["pss"] or sample["rss"]
+
+
+# startup latency and memory per worker of a fresh pool of every backend and size
+def measure_startup(executor_types, pool_sizes, repeats=3):
+    rows = []
+    for executor_type in executor_types:
+        for num_workers in pool_sizes:
+            startups, memory = [], []
+            for _ in range(repeats):
+                before = _tree_memory()
+                created = time.perf_counter()
+                pool = executor_type(max_workers=num_workers)
+                try:
+                    startups.append(start_workers(pool, num_workers, created))
+                    memory.append((_tree_memory() - before) / num_workers / (1024 ** 2))
+                finally:
+                    pool.shutdown(wait=True)
+            rows.append({"executor": executor_type.__name__, "workers": num_workers,
+                         "worker_startup_s": statistics.median(startups),
+                         "memory_per_worker_mb": statistics.median(memory)})
+    return rows
+
+
+def workloads(task_num=32):
+    return {
+        "fibonacci": (fib_naive, [(27,)] * task_num),
+        "is_prime": (is_prime, [(n,) for n in generate_numbers(task_num, 10**13, 10**14)]),
+    }
+
+
+def main():
+    cores = os.cpu_count() or 4
+    pool_sizes = sorted({1, 2, 4, cores})
+    executor_types = backends()
+    labels = {t.__name__: backend_name(t) for t in executor_types}
+    info = runtime()
+    print(f"Python {info['python']}: GIL {'enabled' if info['gil_enabled'] else 'disabled'}, "
+          f"InterpreterPoolExecutor {'available' if info['interpreter_pool'] else 'not available'}")
+
+    startup = {(r["executor"], r["workers"]): r for r in measure_startup(executor_types, pool_sizes)}
+    # warm pools, so the runtimes below contain no worker start-up (measured separately above)
+    with WarmPoolManager() as manager:
+        results = run_benchmark(workloads(), executor_types, pool_sizes=pool_sizes, repeats=3, warmup=1,
+                                monitor_interval=0.05, pool_manager=manager)
+    add_speedup(results)
+    for r in results:
+        r["backend"] = labels[r["executor"]]
+        r.update(info)
+        row = startup[(r["executor"], r["workers"])]
+        r["worker_startup_s"] = row["worker_startup_s"]
+        r["memory_per_worker_mb"] = row["memory_per_worker_mb"]
+    print_results(results)
+    print_scaling(results)
+    print(f"{'backend':>24} {'workers':>7} {'startup':>10} {'memory/worker':>14}")
+    for (name, workers), row in startup.items():
+        print(f"{labels[name]:>24} {workers:>7} {row['worker_startup_s'] * 1e3:>7.1f} ms "
+              f"{row['memory_per_worker_mb']:>10.1f} MB")
+    save_results(results, "results/gil_backends")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import hashlib
+import lzma
+import os
+import sys
+import zlib
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import lru_cache
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from Executors.warm_pool import WarmPoolManager
+from Harness.benchmark import run_benchmark, print_results, save_results
+from fib_engine import fib_naive
+
+# CPU workloads whose inner loop runs in C with the GIL released
+#
+# fibonacci and is_prime hold the GIL for their whole run, so ThreadPoolExecutor cannot
+# use more than one core on them. Most production CPU work calls into C code that
+# releases the GIL: zlib/lzma release it while (de)compressing, hashlib while hashing
+# buffers larger than 2 KB, and NumPy while BLAS multiplies matrices. This suite runs
+# those kernels (including the "Data Compression" workload from workloads.md) next to
+# the GIL-bound fibonacci on thread and process pools of several sizes, and reports
+# speedup = throughput / throughput with one worker, to show where threads scale with
+# cores and where they do not.
+
+MB = 1024 * 1024
+BLAS_THREAD_VARS = ("OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "OMP_NUM_THREADS", "VECLIB_MAXIMUM_THREADS")
+
+
+# one BLAS thread per worker, so pool size is the only source of parallelism
+# (only takes effect before NumPy is first imported, which is why the kernels import it
+# lazily; workers started afterwards inherit the environment)
+def limit_blas_threads(threads=1):
+    for var in BLAS_THREAD_VARS:
+        os.environ.setdefault(var, str(threads))
+
+
+# deterministic, moderately compressible input (random words from a small vocabulary);
+# built once per process and reused by every task
+@lru_cache(maxsize=None)
+def _buffer(size):
+    import numpy as np
+    rng = np.random.default_rng(size)
+    vocab = np.frombuffer(b"lorem ipsum dolor sit amet consectetur adipiscing elit sed do ", dtype=np.uint8)
+    return vocab[rng.integers(0, len(vocab), size)].tobytes()
+
+
+@lru_cache(maxsize=None)
+def _matrices(n):
+    import numpy as np
+    rng = np.random.default_rng(n)
+    return rng.random((n, n)), rng.random((n, n))
+
+
+def zlib_compress(size, level=6):
+    return len(zlib.compress(_buffer(size), level))
+
+
+def lzma_compress(size, preset=1):
+    return len(lzma.compress(_buffer(size), preset=preset))
+
+
+def sha256_digest(size, rounds=4):
+    digest = hashlib.sha256()
+    data = _buffer(size)
+    for _ in range(rounds):
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def numpy_matmul(n):
+    a, b = _matrices(n)
+    return float((a @ b).trace())
+
+
+# workload registry: name -> (function, list of argument tuples)
+def workloads(task_num=16):
+    return {
+        "zlib_compress": (zlib_compress, [(4 * MB, 6)] * task_num),
+        "lzma_compress": (lzma_compress, [(1 * MB, 1)] * task_num),
+        "sha256_digest": (sha256_digest, [(16 * MB, 4)] * task_num),
+        "numpy_matmul": (numpy_matmul, [(768,)] * task_num),
+        "fibonacci_gil": (fib_naive, [(25,)] * task_num),
+    }
+
+
+# speedup / parallel efficiency of every record against its 1-worker record
+def add_speedup(results):
+    base = {(r["workload"], r["executor"]): r["throughput_median"] for r in results if r["workers"] == 1}
+    for r in results:
+        reference = base.get((r["workload"], r["executor"]))
+        if reference:
+            r["speedup"] = r["throughput_median"] / reference
+            r["efficiency"] = r["speedup"] / r["workers"]
+    return results
+
+
+def print_scaling(results):
+    print(f"{'workload':>15} {'executor':>20} {'workers':>7} {'throughput':>12} {'speedup':>8} {'efficiency':>10}")
+    for r in results:
+        if "speedup" in r:
+            print(f"{r['workload']:>15} {r['executor']:>20} {r['workers']:>7} "
+                  f"{r['throughput_median']:>8.2f} t/s {r['speedup']:>7.2f}x {r['efficiency']:>10.0%}")
+
+
+def main():
+    limit_blas_threads()
+    cores = os.cpu_count() or 4
+    pool_sizes = sorted({1, 2, 4, cores})
+    # the BLAS limit is already in the environment when the fork server imports NumPy
+    with WarmPoolManager(("numpy",)) as manager:
+        results = run_benchmark(workloads(), (ThreadPoolExecutor, ProcessPoolExecutor),
+                                pool_sizes=pool_sizes, repeats=3, warmup=1, monitor_interval=0.05,
+                                pool_manager=manager)
+    add_speedup(results)
+    print_results(results)
+    print_scaling(results)
+    save_results(results, "results/native_kernels")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,54 +1,69 @@
+import os
 import random
-import time
-import psutil
+import sys
 from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
-def is_prime(n):
-    if n < 2:
-        return False
-    if n in (2, 3):
-        return True
-    if n % 2 == 0 or n % 3 == 0:
-        return False
-    i = 5
-    while i * i <= n: 
-        if n % i == 0 or n % (i + 2) == 0:
-            return False
-        i += 6
-    return True
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from Executors.adaptive import AdaptiveThreadPoolExecutor
+from Executors.chunking import sweep_chunksizes, print_sweep
+from Executors.warm_pool import WarmPoolManager
+from Harness.benchmark import run_benchmark, single_args, print_results, save_results
+from prime_engine import SIEVE_LIMIT, SharedPrimes, is_prime_batch
+from pure_kernels import is_prime
 
 def generate_numbers(num_tasks, min_value=10**12, max_value=10**15):
     return [random.randint(min_value, max_value) for _ in range(num_tasks)]
 
-def measure_performance(executor, task, inputs):
-    
-    start_time = time.time()
-    process = psutil.Process()  
-    initial_memory = process.memory_info().rss  
-    
-    with executor(max_workers=4) as executor:
-        results = list(executor.map(task, inputs))
-        cpu_usage = psutil.cpu_percent(interval=0)
-    
-    end_time = time.time()
-    final_memory = process.memory_info().rss  
-    elapsed_time = end_time - start_time
-    throughput = len(inputs) / elapsed_time  
-
-    print(f"{type(executor).__name__} Time: {elapsed_time:.2f} s")
-    print(f"{type(executor).__name__} Throughput: {throughput:.2f} tasks/sec")
-    print(f"{type(executor).__name__} CPU usage: {cpu_usage:.2f}%")
-    print(f"{type(executor).__name__} Memory usage: {(final_memory - initial_memory) / (1024 ** 2):.2f} MB\n")
+# mode="chunked" batches the inputs into auto-sized chunks instead of one task per number
+# engine="scalar" runs `task` once per number; engine="batch" ignores `task` and tests
+# chunks of numbers with prime_engine.is_prime_batch (sieve in shared memory, vectorized
+# trial division, Miller-Rabin for the survivors), one chunk per task
+# pool_manager (Executors.warm_pool.WarmPoolManager) reuses warm pools across calls
+def measure_performance(executors, task, inputs, num_workers=4, repeats=3, warmup=1, mode="submit",
+                        engine="scalar", sieve_limit=SIEVE_LIMIT, chunks_per_worker=4, pool_manager=None):
+    if engine == "scalar":
+        workloads = {task.__name__: (task, single_args(inputs))}
+        results = run_benchmark(workloads, executors, pool_sizes=(num_workers,),
+                                repeats=repeats, warmup=warmup, monitor_interval=0.05, mode=mode,
+                                pool_manager=pool_manager)
+    elif engine == "batch":
+        size = max(1, -(-len(inputs) // (num_workers * chunks_per_worker)))
+        with SharedPrimes(sieve_limit) as primes:
+            chunks = [(inputs[i:i + size], primes.handle) for i in range(0, len(inputs), size)]
+            workloads = {"is_prime_batch": (is_prime_batch, chunks, len(inputs))}
+            results = run_benchmark(workloads, executors, pool_sizes=(num_workers,),
+                                    repeats=repeats, warmup=warmup, monitor_interval=0.05,
+                                    pool_manager=pool_manager)
+    else:
+        raise ValueError(f"Unknown engine {engine!r}. Use 'scalar' or 'batch'.")
+    for r in results:
+        r["engine"] = engine
+    print_results(results)
+    return results
 
 def main():
     num_tasks = 1000 
     numbers = generate_numbers(num_tasks)
 
-    print("ThreadPoolExecutor:")
-    measure_performance(ThreadPoolExecutor, is_prime, numbers)
+    executors = (ThreadPoolExecutor, ProcessPoolExecutor, AdaptiveThreadPoolExecutor)
+    # warm pools shared by all runs below; the batch engine's NumPy is imported once into the
+    # fork server instead of by every worker
+    with WarmPoolManager(("numpy",)) as manager:
+        results = measure_performance(executors, is_prime, numbers, pool_manager=manager)
+        results += measure_performance((ProcessPoolExecutor,), is_prime, numbers, mode="chunked",
+                                       pool_manager=manager)
+        # algorithmic speed-up vs executor-level parallelism: the batch engine on 1 and 4 workers
+        results += measure_performance((ThreadPoolExecutor, ProcessPoolExecutor), is_prime, numbers,
+                                       num_workers=1, engine="batch", pool_manager=manager)
+        results += measure_performance((ThreadPoolExecutor, ProcessPoolExecutor), is_prime, numbers,
+                                       engine="batch", pool_manager=manager)
+    save_results(results, "results/prime")
 
-    print("ProcessPoolExecutor:")
-    measure_performance(ProcessPoolExecutor, is_prime, numbers)
+    # throughput of ProcessPoolExecutor as a function of chunk size
+    print("ProcessPoolExecutor chunk-size sweep:")
+    sweep = sweep_chunksizes(is_prime, single_args(numbers), max_workers=4)
+    print_sweep(sweep)
+    save_results(sweep, "results/prime_chunksize_sweep")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,19 @@
+# GIL-bound pure-Python kernels
+#
+# Only the standard library may be imported here: subinterpreter workers
+# (Executors/interpreters.py) import this module to unpickle the task functions, and
+# cannot load extension modules without subinterpreter support (NumPy, psutil).
+
+def is_prime(n):
+    if n < 2:
+        return False
+    if n in (2, 3):
+        return True
+    if n % 2 == 0 or n % 3 == 0:
+        return False
+    i = 5
+    while i * i <= n:
+        if n % i == 0 or n % (i + 2) == 0:
+            return False
+        i += 6
+    return True
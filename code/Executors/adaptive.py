@@ -0,0 +1,229 @@
+'''
+Adaptive thread pool that resizes itself based on observed throughput.
+
+``AdaptiveThreadPoolExecutor`` has the same ``submit``/``map``/``shutdown`` API as
+``ThreadPoolExecutor``. ``max_workers`` is the upper bound; the pool starts at
+``min_workers`` and a controller thread hill-climbs on completed tasks per second:
+
+- every ``interval`` seconds it measures throughput over the last window
+- if the previous move (grow or shrink) raised throughput by more than
+  ``threshold``, it keeps moving in the same direction
+- if throughput dropped, it undoes the move and reverses direction
+- if throughput stayed flat after growing, the added workers did not help
+  (e.g. GIL-bound fibonacci), so it backs off by one step
+- after backing off it holds for ``cooldown`` intervals before probing again
+- it only grows while tasks are waiting in the queue, and shrinks when idle
+
+Every decision is recorded and returned by ``metrics()``. ``reset_metrics()`` starts a
+new measurement period, so a pool reused across benchmark runs reports each run on
+its own.
+'''
+import itertools
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Executor, Future
+
+
+class AdaptiveThreadPoolExecutor(Executor):
+
+    _counter = itertools.count()
+
+    def __init__(self, max_workers=None, min_workers=1, interval=0.5, threshold=0.05, step=1,
+                 cooldown=4, thread_name_prefix=""):
+        if max_workers is None:
+            max_workers = min(32, (os.cpu_count() or 1) + 4)
+        if max_workers <= 0:
+            raise ValueError("max_workers must be greater than 0")
+        self.max_workers = max_workers
+        self.min_workers = max(1, min(min_workers, max_workers))
+        self.interval = interval
+        self.threshold = threshold
+        self.step = step
+        self.cooldown = cooldown
+        self.decisions = []
+        self._prefix = thread_name_prefix or f"AdaptiveThreadPool-{next(self._counter)}"
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._threads = set()
+        self._thread_ids = itertools.count()   # thread names stay unique after retirements
+        self._target = self.min_workers
+        self._completed = 0
+        self._completed_base = 0    # _completed at the last reset_metrics()
+        self._peak = 0
+        self._direction = 1
+        self._last_throughput = None
+        self._last_action = None
+        self._cooldown = 0
+        self._shutdown = False
+        self._stop = threading.Event()
+        self._start = time.perf_counter()
+        with self._lock:
+            self._spawn(self._target)
+        self._controller = threading.Thread(target=self._control, name=self._prefix + "-controller",
+                                            daemon=True)
+        self._controller.start()
+
+    def submit(self, fn, /, *args, **kwargs):
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            future = Future()
+            self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        with self._lock:
+            self._shutdown = True
+            if cancel_futures:
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not None:
+                        item[0].cancel()
+            threads = list(self._threads)
+            for _ in threads:
+                self._queue.put(None)
+        self._stop.set()
+        if wait:
+            for t in threads:
+                t.join()
+            self._controller.join()
+
+    # current number of worker threads
+    @property
+    def workers(self):
+        with self._lock:
+            return len(self._threads)
+
+    def metrics(self):
+        actions = [d["action"] for d in self.decisions]
+        return {
+            "workers": self.workers,
+            "peak_workers": self._peak,
+            "completed": self._completed - self._completed_base,
+            "grows": actions.count("grow"),
+            "shrinks": actions.count("shrink") + actions.count("back-off") + actions.count("idle"),
+            "decisions": list(self.decisions),
+        }
+
+    # forget the decisions, completions and peak so far; metrics() then only covers what
+    # happens from now on (the controller keeps its own throughput history)
+    def reset_metrics(self):
+        with self._lock:
+            self.decisions = []
+            self._completed_base = self._completed
+            self._peak = len(self._threads)
+
+    # start n worker threads (caller holds the lock)
+    def _spawn(self, n):
+        for _ in range(n):
+            t = threading.Thread(target=self._worker, daemon=True,
+                                 name=f"{self._prefix}_{next(self._thread_ids)}")
+            self._threads.add(t)
+            t.start()
+        self._peak = max(self._peak, len(self._threads))
+
+    def _worker(self):
+        me = threading.current_thread()
+        while True:
+            with self._lock:
+                # retire when the pool was shrunk below the current thread count
+                if len(self._threads) > self._target and not self._shutdown:
+                    self._threads.discard(me)
+                    return
+            try:
+                item = self._queue.get(timeout=self.interval)
+            except queue.Empty:
+                continue
+            if item is None:
+                with self._lock:
+                    self._threads.discard(me)
+                return
+            future, fn, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+            with self._lock:
+                self._completed += 1
+            del item, future
+
+    def _control(self):
+        last_completed = 0
+        last_time = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            with self._lock:
+                completed = self._completed
+            throughput = (completed - last_completed) / (now - last_time)
+            last_completed, last_time = completed, now
+            self._adjust(throughput)
+
+    # one hill-climbing step
+    def _adjust(self, throughput):
+        backlog = self._queue.qsize()
+        with self._lock:
+            if self._shutdown:
+                return
+            before = self._target
+            action, reason = "hold", ""
+            last = self._last_throughput
+            if backlog == 0 and throughput == 0:
+                if before > self.min_workers:
+                    action, reason = "idle", "no work queued"
+            elif self._cooldown > 0:
+                self._cooldown -= 1
+                reason = "cooldown"
+            elif last is None or self._last_action not in ("grow", "shrink", "back-off"):
+                if backlog > 0 and before < self.max_workers:
+                    action, reason = "grow", "probing with tasks queued"
+                    self._direction = 1
+            else:
+                gain = (throughput - last) / max(last, 1e-9)
+                if gain > self.threshold:
+                    # the last move helped: keep going the same way
+                    reason = f"throughput {gain:+.0%}"
+                    if self._direction > 0 and backlog > 0 and before < self.max_workers:
+                        action = "grow"
+                    elif self._direction < 0 and before > self.min_workers:
+                        action = "shrink"
+                elif gain < -self.threshold:
+                    # the last move hurt: undo it and stay there for a while
+                    reason = f"throughput {gain:+.0%}"
+                    self._direction = -self._direction
+                    self._cooldown = self.cooldown
+                    if self._last_action == "grow" and before > self.min_workers:
+                        action = "back-off"
+                    elif self._last_action != "grow" and before < self.max_workers:
+                        action = "grow"
+                elif self._last_action == "grow" and before > self.min_workers:
+                    # the added workers did not help (e.g. GIL-bound work)
+                    action, reason = "back-off", f"throughput flat ({gain:+.0%})"
+                    self._direction = -1
+                    self._cooldown = self.cooldown
+            if action == "grow":
+                self._target = min(self.max_workers, before + self.step)
+            elif action in ("shrink", "back-off", "idle"):
+                self._target = max(self.min_workers, before - self.step)
+            if self._target > len(self._threads):
+                self._spawn(self._target - len(self._threads))
+            if action != "hold":
+                self.decisions.append({
+                    "t": time.perf_counter() - self._start,
+                    "action": action,
+                    "reason": reason,
+                    "workers_before": before,
+                    "workers_after": self._target,
+                    "throughput": throughput,
+                    "backlog": backlog,
+                })
+            self._last_action = action
+            self._last_throughput = throughput
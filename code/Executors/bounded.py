@@ -0,0 +1,227 @@
+'''
+Executor with a bounded work queue, backpressure and admission control.
+
+``ThreadPoolExecutor.submit`` and ``ProcessPoolExecutor.submit`` queue without limit,
+and ``Executor.map`` submits every input before it returns the first result, so
+memory grows with the backlog. ``BoundedExecutor`` wraps either pool type and admits
+at most ``max_pending`` tasks (queued + running) at a time. When it is full,
+``submit`` follows ``policy``:
+
+- ``block``:   wait until a task finishes (backpressure on the producer)
+- ``timeout``: wait at most ``timeout`` seconds, then raise ``QueueFullError``
+- ``reject``:  raise ``QueueFullError`` at once (the new task is dropped)
+- ``shed``:    cancel the oldest task that has not started yet and admit the new one
+               (its future ends up cancelled); if every admitted task is already
+               running, raise ``QueueFullError``
+
+``map`` is lazy: it pulls from the input iterables only as tasks complete, keeping
+at most ``max_pending`` tasks in flight, so a million-item generator is streamed in
+constant memory. It yields results in input order, like ``Executor.map``. Its tasks
+always wait for a slot and are never shed by a concurrent ``submit``.
+
+``metrics()`` reports admitted / rejected / shed counts, the peak number of pending
+tasks and the time producers spent blocked, since creation or the last
+``reset_metrics()``.
+'''
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+
+POLICIES = ("block", "timeout", "reject", "shed")
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+class BoundedExecutor(Executor):
+
+    def __init__(self, max_workers=None, max_pending=None, policy="block", timeout=None,
+                 executor_type=ThreadPoolExecutor, **kwargs):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy {policy!r}. Use one of: {', '.join(POLICIES)}.")
+        if policy == "timeout" and timeout is None:
+            raise ValueError("policy 'timeout' needs a timeout")
+        self.executor = executor_type(max_workers=max_workers, **kwargs)
+        self.max_workers = getattr(self.executor, "_max_workers", max_workers)
+        self.max_pending = max_pending if max_pending is not None else 2 * self.max_workers
+        if self.max_pending <= 0:
+            raise ValueError("max_pending must be greater than 0")
+        self.policy = policy
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._pending = deque()     # sheddable admitted futures (submit), oldest first
+        self._inflight = 0          # all admitted futures not done yet, map's included
+        self._counts = {"submitted": 0, "admitted": 0, "rejected": 0, "shed": 0}
+        self._peak = 0
+        self._blocked = 0.0
+
+    def submit(self, fn, /, *args, **kwargs):
+        with self._lock:
+            self._counts["submitted"] += 1
+        if not self._admit():
+            with self._lock:
+                self._counts["rejected"] += 1
+            raise QueueFullError(f"{self.max_pending} tasks pending")
+        return self._enqueue(fn, args, kwargs)
+
+    # lazy, order-preserving map with at most max_pending tasks in flight
+    # (chunksize is accepted for compatibility with Executor.map and ignored)
+    def map(self, fn, *iterables, timeout=None, chunksize=1):
+        end_time = None if timeout is None else time.monotonic() + timeout
+        inputs = zip(*iterables)
+        window = deque()
+        # fill the window now, like Executor.map submits before returning
+        for args in itertools.islice(inputs, self.max_pending):
+            window.append(self._submit_blocking(fn, args))
+
+        def results():
+            try:
+                while window:
+                    future = window.popleft()
+                    if end_time is None:
+                        yield future.result()
+                    else:
+                        yield future.result(end_time - time.monotonic())
+                    for args in itertools.islice(inputs, 1):
+                        window.append(self._submit_blocking(fn, args))
+            finally:
+                for future in window:
+                    future.cancel()
+        return results()
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        self.executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def metrics(self):
+        with self._lock:
+            return {"policy": self.policy, "max_pending": self.max_pending, **self._counts,
+                    "pending_peak": self._peak, "blocked_s": self._blocked}
+
+    # start a new measurement period (the peak restarts from the tasks in flight now)
+    def reset_metrics(self):
+        with self._lock:
+            self._counts = dict.fromkeys(self._counts, 0)
+            self._peak = self._inflight
+            self._blocked = 0.0
+
+    # take a slot according to the policy; False if the task must be rejected
+    def _admit(self):
+        if self.policy == "reject":
+            return self._slots.acquire(blocking=False)
+        if self.policy == "shed":
+            while not self._slots.acquire(blocking=False):
+                if not self._shed_oldest():
+                    return False
+            return True
+        start = time.perf_counter()
+        if self.policy == "block":
+            admitted = self._slots.acquire()
+        else:
+            admitted = self._slots.acquire(timeout=self.timeout)
+        with self._lock:
+            self._blocked += time.perf_counter() - start
+        return admitted
+
+    # map never drops inputs: it always waits for a slot, and its tasks cannot be shed
+    def _submit_blocking(self, fn, args):
+        start = time.perf_counter()
+        self._slots.acquire()
+        with self._lock:
+            self._counts["submitted"] += 1
+            self._blocked += time.perf_counter() - start
+        return self._enqueue(fn, args, {}, sheddable=False)
+
+    # hand an admitted task (its slot already taken) to the wrapped executor
+    def _enqueue(self, fn, args, kwargs, sheddable=True):
+        try:
+            future = self.executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._counts["admitted"] += 1
+            self._inflight += 1
+            self._peak = max(self._peak, self._inflight)
+            if sheddable:
+                self._pending.append(future)
+        future.add_done_callback(self._release)
+        return future
+
+    # cancel the oldest admitted task that has not started; its callback frees the slot
+    def _shed_oldest(self):
+        with self._lock:
+            candidates = list(self._pending)
+        for future in candidates:
+            if future.cancel():
+                with self._lock:
+                    self._counts["shed"] += 1
+                return True
+        return False
+
+    def _release(self, future):
+        with self._lock:
+            self._inflight -= 1
+            try:
+                self._pending.remove(future)
+            except ValueError:
+                pass
+        self._slots.release()
+
+
+def _square(x):
+    return x * x
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+# peak traced memory (tracemalloc) of Executor.map vs the lazy map over a generator
+def compare_map_memory(num_items=200_000, max_workers=4):
+    import tracemalloc
+    rows = []
+    for name, executor in (("ThreadPoolExecutor.map", ThreadPoolExecutor(max_workers)),
+                           ("BoundedExecutor.map", BoundedExecutor(max_workers))):
+        tracemalloc.start()
+        start = time.perf_counter()
+        with executor:
+            total = sum(executor.map(_square, range(num_items)))
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        rows.append({"map": name, "items": num_items, "seconds": seconds, "peak_mb": peak / (1024 ** 2),
+                     "checksum": total})
+    return rows
+
+
+# a producer that submits faster than the pool can serve, under every policy
+def compare_policies(num_tasks=200, service=0.01, interval=0.001, max_workers=4, max_pending=8, timeout=0.02):
+    rows = []
+    for policy in POLICIES:
+        executor = BoundedExecutor(max_workers, max_pending, policy, timeout if policy == "timeout" else None)
+        start = time.perf_counter()
+        futures = []
+        with executor:
+            for _ in range(num_tasks):
+                try:
+                    futures.append(executor.submit(_sleep, service))
+                except QueueFullError:
+                    pass
+                time.sleep(interval)
+        completed = sum(1 for future in futures if not future.cancelled())
+        rows.append({**executor.metrics(), "completed": completed, "seconds": time.perf_counter() - start})
+    return rows
+
+
+if __name__ == "__main__":
+    for r in compare_map_memory():
+        print(f"{r['map']:<24} {r['items']} items | {r['seconds']:.2f} s | peak {r['peak_mb']:.1f} MB")
+    for r in compare_policies():
+        print(f"{r['policy']:<8} admitted {r['admitted']:>4} | completed {r['completed']:>4} | "
+              f"rejected {r['rejected']:>4} | shed {r['shed']:>4} | blocked {r['blocked_s']:.2f} s | "
+              f"{r['seconds']:.2f} s")
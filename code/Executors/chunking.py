@@ -0,0 +1,160 @@
+'''
+Automatic chunk-size tuning for map-style workloads on process pools.
+
+Sending 1000 tiny ``is_prime`` calls through ``ProcessPoolExecutor`` one at a time
+pays a pickle + pipe round-trip per item. ``chunked_map`` groups the inputs into
+chunks and sizes them from two measurements:
+
+- IPC cost: mean round-trip time of an empty task through the pool
+- item cost: per-item service time measured inside the workers, starting from a
+  small probe chunk and updated (EWMA) as every chunk completes
+
+Each new chunk is made large enough that the round-trip is at most ``overhead``
+(default 5%) of the chunk's compute time, but small enough that every worker still
+gets several chunks (``min_chunks_per_worker``) so uneven costs do not leave
+stragglers. Only ``2 * max_workers`` chunks are in flight at a time, so later chunks
+use the refined estimate. Results are returned in input order.
+
+``calibrate()`` takes both measurements up front and returns a ``ChunkTuner`` for
+``chunked_map(tuner=...)``, so a benchmark can keep calibration out of its timed run;
+the time it took is ``tuner.calibration_s``.
+'''
+import math
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+
+def _noop():
+    return None
+
+
+# runs in the worker: results of one chunk plus the time spent computing it
+def _run_chunk(fn, chunk):
+    start = time.perf_counter()
+    results = [fn(*args) for args in chunk]
+    return results, time.perf_counter() - start
+
+
+# mean submit -> result time of an empty task
+def measure_ipc_cost(executor, samples=20):
+    executor.submit(_noop).result()  # make sure the workers are up
+    start = time.perf_counter()
+    for _ in range(samples):
+        executor.submit(_noop).result()
+    return (time.perf_counter() - start) / samples
+
+
+class ChunkTuner:
+
+    def __init__(self, ipc_cost, num_items, max_workers, overhead=0.05,
+                 min_chunks_per_worker=4, smoothing=0.3):
+        self.ipc_cost = ipc_cost
+        self.overhead = overhead
+        self.smoothing = smoothing
+        self.item_cost = None
+        self.calibration_s = None
+        self.max_chunk = max(1, math.ceil(num_items / (max_workers * min_chunks_per_worker)))
+
+    def observe(self, items, seconds):
+        cost = seconds / max(items, 1)
+        if self.item_cost is None:
+            self.item_cost = cost
+        else:
+            self.item_cost += self.smoothing * (cost - self.item_cost)
+
+    def next_size(self):
+        if self.item_cost is None:
+            return 1
+        if self.item_cost == 0:
+            return self.max_chunk
+        size = math.ceil(self.ipc_cost / (self.overhead * self.item_cost))
+        return max(1, min(size, self.max_chunk))
+
+
+# IPC cost and a first item cost (one probe chunk of inputs, results discarded) measured
+# before the run; worker start-up is not counted in tuner.calibration_s
+def calibrate(executor, fn, inputs, max_workers, overhead=0.05, probe=None):
+    executor.submit(_noop).result()
+    start = time.perf_counter()
+    tuner = ChunkTuner(measure_ipc_cost(executor), len(inputs), max_workers, overhead)
+    if inputs:
+        chunk = inputs[:probe or min(tuner.max_chunk, 4)]
+        _, seconds = executor.submit(_run_chunk, fn, chunk).result()
+        tuner.observe(len(chunk), seconds)
+    tuner.calibration_s = time.perf_counter() - start
+    return tuner
+
+
+# map fn over argument tuples in auto-sized chunks (chunksize=None) or fixed chunks
+# a tuner from calibrate() skips the calibration; otherwise it runs inside this call
+# returns results in order, per-item latencies (ns) and the chunk sizes used
+def chunked_map(executor, fn, inputs, max_workers, chunksize=None, overhead=0.05, probe=None, tuner=None):
+    n = len(inputs)
+    if chunksize is not None:
+        tuner = None
+    elif tuner is None:
+        tuner = ChunkTuner(measure_ipc_cost(executor), n, max_workers, overhead)
+    out = [None] * n
+    latencies = [0] * n
+    sizes = []
+    pending = {}
+    pos = 0
+
+    def submit(size):
+        chunk = inputs[pos:pos + size]
+        future = executor.submit(_run_chunk, fn, chunk)
+        pending[future] = (pos, len(chunk), time.perf_counter_ns())
+        sizes.append(len(chunk))
+        return future, len(chunk)
+
+    def collect(future):
+        start, count, submitted = pending.pop(future)
+        results, seconds = future.result()
+        out[start:start + count] = results
+        latencies[start:start + count] = [time.perf_counter_ns() - submitted] * count
+        if tuner is not None:
+            tuner.observe(count, seconds)
+
+    if tuner is not None and tuner.item_cost is None and n:
+        # small probe chunk so the following chunks are sized from a measurement
+        future, count = submit(probe or min(tuner.max_chunk, 4))
+        pos += count
+        future.result()
+        collect(future)
+    while pos < n or pending:
+        while pos < n and len(pending) < 2 * max_workers:
+            _, count = submit(chunksize if tuner is None else tuner.next_size())
+            pos += count
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            collect(future)
+    return out, latencies, sizes
+
+
+# throughput for each fixed chunk size and for the auto-tuned mode
+def sweep_chunksizes(fn, inputs, max_workers=4, chunksizes=(1, 2, 4, 8, 16, 32, 64, 128),
+                     executor_type=ProcessPoolExecutor):
+    rows = []
+    for chunksize in list(chunksizes) + [None]:
+        with executor_type(max_workers=max_workers) as executor:
+            executor.submit(_noop).result()   # exclude pool start-up from the sweep
+            # the auto mode is calibrated before the clock starts, like the fixed sizes need none
+            tuner = calibrate(executor, fn, inputs, max_workers) if chunksize is None else None
+            start = time.perf_counter()
+            _, _, sizes = chunked_map(executor, fn, inputs, max_workers, chunksize, tuner=tuner)
+            elapsed = time.perf_counter() - start
+        rows.append({
+            "chunksize": "auto" if chunksize is None else chunksize,
+            "chunks": len(sizes),
+            "mean_chunk": len(inputs) / len(sizes),
+            "runtime_s": elapsed,
+            "throughput": len(inputs) / elapsed,
+        })
+    return rows
+
+
+def print_sweep(rows):
+    print(f"{'chunksize':>9} {'chunks':>7} {'mean chunk':>11} {'runtime':>9} {'throughput':>12}")
+    for r in rows:
+        print(f"{r['chunksize']:>9} {r['chunks']:>7} {r['mean_chunk']:>11.1f} "
+              f"{r['runtime_s']:>8.3f}s {r['throughput']:>8.1f} t/s")
@@ -0,0 +1,330 @@
+'''
+Executor that routes every callable to a thread pool or a process pool.
+
+The scripts pick the pool by hand ("ThreadPool for I/O, ProcessPool for CPU").
+``HybridExecutor`` keeps both pools and decides per callable:
+
+- the first ``probes`` calls of a callable run on the thread pool, one at a time
+  (concurrent probes would wait for each other's GIL and look I/O-bound); later
+  calls submitted meanwhile are held back until the decision is made
+- each probe records the CPU time of its thread (``time.thread_time``), its wall
+  time and the pickled size of its arguments and result
+- a callable whose probes were mostly on-CPU (``cpu / wall >= cpu_threshold``) goes
+  to the process pool, unless shipping it there (IPC round-trip plus payload bytes
+  at ``bandwidth``) would cost more than ``overhead`` of its wall time; everything
+  else, and any callable that cannot be pickled, stays on threads
+- the process pool is only started once a callable is routed to it; the decision runs
+  on its own short-lived thread, since it may start that pool and time IPC round trips,
+  and no pool is started once the executor has shut its pools down
+
+``metrics()`` returns the decision for every callable with the numbers behind it.
+``compare()`` runs task streams on ``ThreadPoolExecutor``, ``ProcessPoolExecutor``
+and ``HybridExecutor`` and reports the hybrid's speedup over either pool alone.
+
+CPU time counts C code that releases the GIL as well (zlib, hashlib, NumPy), so
+such callables go to processes even though threads would also scale on them.
+'''
+import os
+import pickle
+import statistics
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import CancelledError, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import wait as wait_all
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from Executors.chunking import measure_ipc_cost
+from Harness.benchmark import save_results
+
+
+# runs on the thread pool: the call plus its CPU and wall time
+def _profiled(fn, args, kwargs):
+    wall, cpu = time.perf_counter(), time.thread_time()
+    try:
+        ok, value = True, fn(*args, **kwargs)
+    except Exception as error:
+        ok, value = False, error
+    return ok, value, time.thread_time() - cpu, time.perf_counter() - wall
+
+
+# copy the outcome of a pool future to the future handed to the caller
+# (outer is already RUNNING, so a cancelled inner future becomes a CancelledError)
+def _chain(inner, outer):
+    if inner.cancelled():
+        outer.set_exception(CancelledError())
+    elif inner.exception() is not None:
+        outer.set_exception(inner.exception())
+    else:
+        outer.set_result(inner.result())
+
+
+class _Route:
+
+    def __init__(self, name):
+        self.name = name
+        self.samples = []          # (cpu s, wall s, payload bytes) per probe
+        self.picklable = True
+        self.probing = False
+        self.pending = deque()     # (future, args, kwargs) waiting for the decision
+        self.backend = None
+        self.reason = None
+        self.counts = {"thread": 0, "process": 0}
+
+
+class HybridExecutor(Executor):
+
+    def __init__(self, max_workers=None, thread_workers=None, process_workers=None, probes=3,
+                 cpu_threshold=0.5, overhead=0.1, bandwidth=500e6, mp_context=None):
+        self.thread_workers = thread_workers or max_workers
+        self.process_workers = process_workers or max_workers
+        self.probes = probes
+        self.cpu_threshold = cpu_threshold
+        self.overhead = overhead
+        self.bandwidth = bandwidth
+        self.ipc_cost = None
+        self._mp_context = mp_context
+        self._threads = ThreadPoolExecutor(max_workers=self.thread_workers)
+        self._processes = None
+        self._routes = {}
+        self._inflight = set()     # probed or held-back futures, not yet done
+        self._lock = threading.Lock()
+        self._shutdown = False
+        self._closed = False       # pools shut down: no process pool may be started any more
+
+    def submit(self, fn, /, *args, **kwargs):
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            route = self._routes.get(fn)
+            if route is None:
+                route = self._routes[fn] = _Route(getattr(fn, "__qualname__", repr(fn)))
+            backend = route.backend
+            if backend is None:
+                future = Future()
+                self._inflight.add(future)
+                future.add_done_callback(self._inflight.discard)
+                if route.probing:
+                    route.pending.append((future, args, kwargs))
+                    return future
+                route.probing = True
+            else:
+                route.counts[backend] += 1
+        if backend is None:
+            future.set_running_or_notify_cancel()
+            self._probe(route, fn, future, args, kwargs)
+            return future
+        return self._pool(backend).submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        with self._lock:
+            self._shutdown = True
+            if cancel_futures:
+                for route in self._routes.values():
+                    while route.pending:
+                        route.pending.popleft()[0].cancel()
+            inflight = list(self._inflight)
+        if wait:
+            # held-back calls are dispatched from probe callbacks: keep the pools open for them
+            wait_all(inflight)
+        with self._lock:
+            self._closed = True
+            processes = self._processes
+        self._threads.shutdown(wait=wait, cancel_futures=cancel_futures)
+        if processes is not None:
+            processes.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    # routing decision and measurements for every callable seen so far
+    def metrics(self):
+        with self._lock:
+            routes = []
+            for route in self._routes.values():
+                cpu = sum(s[0] for s in route.samples)
+                wall = sum(s[1] for s in route.samples)
+                routes.append({
+                    "callable": route.name, "backend": route.backend, "reason": route.reason,
+                    "probes": len(route.samples),
+                    "cpu_ratio": cpu / wall if wall else None,
+                    "wall_mean_s": wall / len(route.samples) if route.samples else None,
+                    "payload_bytes": statistics.median(s[2] for s in route.samples) if route.samples else None,
+                    "thread_tasks": route.counts["thread"], "process_tasks": route.counts["process"],
+                })
+        return {"ipc_cost_s": self.ipc_cost, "routes": routes}
+
+    def _pool(self, backend):
+        if backend == "thread":
+            return self._threads
+        with self._lock:
+            if self._processes is None:
+                if self._closed:
+                    raise RuntimeError("cannot schedule new futures after shutdown")
+                self._processes = ProcessPoolExecutor(max_workers=self.process_workers,
+                                                      mp_context=self._mp_context)
+            return self._processes
+
+    # run one probe; `future` is already RUNNING
+    def _probe(self, route, fn, future, args, kwargs):
+        with self._lock:
+            route.counts["thread"] += 1
+        try:
+            inner = self._threads.submit(_profiled, fn, args, kwargs)
+        except RuntimeError as error:
+            # the thread pool is shut down: no later probe can run either
+            future.set_exception(error)
+            self._fail_pending(route, error)
+            return
+        inner.add_done_callback(lambda f: self._probed(route, fn, args, f, future))
+
+    # fail the held-back calls of a callable that can no longer be probed
+    def _fail_pending(self, route, error):
+        with self._lock:
+            pending = list(route.pending)
+            route.pending.clear()
+            route.probing = False
+        for outer, _, _ in pending:
+            if outer.set_running_or_notify_cancel():
+                outer.set_exception(error)
+
+    def _probed(self, route, fn, args, inner, future):
+        if inner.cancelled():
+            # only shutdown(cancel_futures=True) cancels a queued probe, and it does so while
+            # holding the pool's shutdown lock: cancel the held-back calls as well instead of
+            # submitting the next probe from here
+            future.set_exception(CancelledError())
+            self._fail_pending(route, CancelledError())
+            return
+        ok, value, cpu, wall = inner.result()
+        try:
+            payload = len(pickle.dumps((fn, args))) + len(pickle.dumps(value))
+        except Exception:
+            route.picklable = False
+            payload = 0
+        if ok:
+            future.set_result(value)
+        else:
+            future.set_exception(value)
+        with self._lock:
+            route.samples.append((cpu, wall, payload))
+            decided = len(route.samples) >= self.probes
+            following = None
+            if not decided:
+                # the oldest held-back call that was not cancelled meanwhile
+                while route.pending:
+                    candidate = route.pending.popleft()
+                    if candidate[0].set_running_or_notify_cancel():
+                        following = candidate
+                        break
+                else:
+                    route.probing = False
+        if not decided:
+            if following is not None:
+                self._probe(route, fn, *following)
+            return
+        # not on this pool thread: deciding may start the process pool and time IPC round trips
+        threading.Thread(target=self._route_pending, args=(route, fn), name="HybridExecutor-decide",
+                         daemon=True).start()
+
+    # make the decision for a callable and dispatch its held-back calls
+    def _route_pending(self, route, fn):
+        backend, reason = self._decide(route)
+        with self._lock:
+            route.backend, route.reason = backend, reason
+            pending = list(route.pending)
+            route.pending.clear()
+            route.counts[backend] += len(pending)
+        for outer, call_args, call_kwargs in pending:
+            if not outer.set_running_or_notify_cancel():
+                continue
+            try:
+                inner = self._pool(backend).submit(fn, *call_args, **call_kwargs)
+            except RuntimeError as error:
+                outer.set_exception(error)
+                continue
+            inner.add_done_callback(lambda f, outer=outer: _chain(f, outer))
+
+    def _decide(self, route):
+        if not route.picklable:
+            return "thread", "not picklable"
+        cpu = sum(s[0] for s in route.samples)
+        wall = sum(s[1] for s in route.samples)
+        ratio = cpu / wall if wall else 0.0
+        if ratio < self.cpu_threshold:
+            return "thread", f"cpu/wall {ratio:.2f} < {self.cpu_threshold}"
+        if self.ipc_cost is None:
+            try:
+                self.ipc_cost = measure_ipc_cost(self._pool("process"))
+            except RuntimeError:
+                return "thread", "shut down before the process pool was started"
+        payload = statistics.median(s[2] for s in route.samples)
+        transfer = self.ipc_cost + payload / self.bandwidth
+        wall_mean = wall / len(route.samples)
+        if transfer > self.overhead * wall_mean:
+            return "thread", f"transfer {transfer * 1e3:.2f} ms > {self.overhead:.0%} of {wall_mean * 1e3:.2f} ms"
+        return "process", f"cpu/wall {ratio:.2f}, transfer {transfer * 1e3:.2f} ms"
+
+
+# wall time of one stream of (fn, args) tasks on a fresh executor
+def _run_stream(executor_type, max_workers, tasks):
+    start = time.perf_counter()
+    with executor_type(max_workers=max_workers) as pool:
+        futures = [pool.submit(fn, *args) for fn, args in tasks]
+        for future in futures:
+            future.result()
+        metrics = pool.metrics() if hasattr(pool, "metrics") else None
+    return time.perf_counter() - start, metrics
+
+
+# every workload alone and all of them interleaved ("mixed"), on each pool type;
+# speedup_vs_<pool> = that pool's median wall time / the hybrid's
+def compare(workloads, max_workers=4, repeats=3):
+    streams = {name: [(fn, args) for args in inputs] for name, (fn, inputs, *_) in workloads.items()}
+    mixed = [task for group in zip(*streams.values()) for task in group]
+    streams["mixed"] = mixed
+    results = []
+    for name, tasks in streams.items():
+        walls = {}
+        for executor_type in (ThreadPoolExecutor, ProcessPoolExecutor, HybridExecutor):
+            runs = [_run_stream(executor_type, max_workers, tasks) for _ in range(repeats)]
+            walls[executor_type.__name__] = statistics.median(run[0] for run in runs)
+            metrics = runs[-1][1]
+        hybrid = walls["HybridExecutor"]
+        results.append({
+            "workload": name, "workers": max_workers, "tasks": len(tasks),
+            **{f"{pool}_s": seconds for pool, seconds in walls.items()},
+            "speedup_vs_thread": walls["ThreadPoolExecutor"] / hybrid,
+            "speedup_vs_process": walls["ProcessPoolExecutor"] / hybrid,
+            "routes": metrics["routes"],
+        })
+    return results
+
+
+if __name__ == "__main__":
+    import random
+    import tempfile
+
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "CPU"))
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "IO"))
+    from prime import is_prime, generate_numbers
+    from fibonacci_performance import fibonacci
+    from eval_file import read_file
+
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as directory:
+        files = []
+        for i in range(64):
+            files.append(os.path.join(directory, f"file_{i}.bin"))
+            with open(files[-1], "wb") as f:
+                f.write(os.urandom(1024 * 1024))
+        workloads = {
+            "is_prime": (is_prime, [(n,) for n in generate_numbers(64, 10**12, 10**13)]),
+            "fibonacci": (fibonacci, [(random.randint(24, 27),) for _ in range(64)]),
+            "read_file": (read_file, [(name,) for name in files]),
+        }
+        results = compare(workloads, max_workers=4)
+    for r in results:
+        routes = ", ".join(f"{route['callable']}->{route['backend']}" for route in r["routes"])
+        print(f"{r['workload']:<10} thread {r['ThreadPoolExecutor_s']:.3f}s | "
+              f"process {r['ProcessPoolExecutor_s']:.3f}s | hybrid {r['HybridExecutor_s']:.3f}s | "
+              f"x{r['speedup_vs_thread']:.2f} vs thread, x{r['speedup_vs_process']:.2f} vs process | {routes}")
+    save_results(results, "results/hybrid")
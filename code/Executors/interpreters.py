@@ -0,0 +1,102 @@
+'''
+GIL-free backends for the CPU workloads: subinterpreters and free-threaded threads.
+
+``fibonacci`` and ``is_prime`` do not scale on ``ThreadPoolExecutor`` because every
+thread waits for the one GIL, and ``ProcessPoolExecutor`` pays for that with a whole
+interpreter process per worker. Newer CPython removes the limit in two ways, both
+detected at runtime:
+
+- ``INTERPRETERS``: Python 3.14+ ships ``concurrent.futures.InterpreterPoolExecutor``
+  (PEP 734), where each worker thread runs its own subinterpreter with its own GIL
+  (PEP 684). ``SubinterpreterPoolExecutor`` is that executor with the parent's
+  ``sys.path`` copied into every worker, so task functions from the ``CPU`` scripts
+  can be unpickled there. Subinterpreters can only import extension modules that
+  support them (NumPy and psutil do not), so task functions must come from modules
+  with pure-Python / stdlib imports (``CPU/pure_kernels.py``, ``CPU/fib_engine.py``).
+- ``FREE_THREADED``: a free-threaded build (``python3.13t`` and later, PEP 703) with
+  the GIL actually disabled; the plain ``ThreadPoolExecutor`` then runs Python code
+  in parallel.
+
+``backends()`` returns the executor types to compare; ``start_workers()`` measures
+how long a pool takes until every worker is running.
+
+This module only imports the standard library, so subinterpreter workers can
+import it.
+'''
+import os
+import sys
+import sysconfig
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+try:
+    from concurrent.futures import InterpreterPoolExecutor
+except ImportError:
+    InterpreterPoolExecutor = None
+
+INTERPRETERS = InterpreterPoolExecutor is not None
+# built without the GIL (Py_GIL_DISABLED) and not re-enabled at startup (PYTHON_GIL=1, or
+# an extension module that does not declare free-threading support)
+FREE_THREADED = bool(sysconfig.get_config_var("Py_GIL_DISABLED")) and not sys._is_gil_enabled()
+
+
+if INTERPRETERS:
+    class SubinterpreterPoolExecutor(InterpreterPoolExecutor):
+
+        def __init__(self, max_workers=None, thread_name_prefix="", initializer=None, initargs=()):
+            if initializer is None:
+                # exec is a builtin, so it can be sent to a fresh interpreter by reference
+                initializer = exec
+                initargs = (f"import sys; sys.path[:] = {sys.path!r}",)
+            super().__init__(max_workers=max_workers, thread_name_prefix=thread_name_prefix,
+                             initializer=initializer, initargs=initargs)
+else:
+    SubinterpreterPoolExecutor = None
+
+
+# a description of the GIL situation of this interpreter, stored with the results
+def runtime():
+    return {
+        "python": sys.version.split()[0],
+        "implementation": sys.implementation.name,
+        "free_threaded_build": bool(sysconfig.get_config_var("Py_GIL_DISABLED")),
+        "gil_enabled": not FREE_THREADED,
+        "interpreter_pool": INTERPRETERS,
+    }
+
+
+# executor types to compare: threads (free-threaded when the GIL is off), processes
+# and, when available, subinterpreters
+def backends():
+    types = [ThreadPoolExecutor, ProcessPoolExecutor]
+    if INTERPRETERS:
+        types.append(SubinterpreterPoolExecutor)
+    return tuple(types)
+
+
+def backend_name(executor_type):
+    if executor_type is ThreadPoolExecutor and FREE_THREADED:
+        return "FreeThreadedThreadPool"
+    return executor_type.__name__
+
+
+# runs in a worker: hold it busy so the next task needs another worker, then identify it
+def _worker_id(hold):
+    time.sleep(hold)
+    return os.getpid(), threading.get_native_id()
+
+
+# submit `max_workers` waiting tasks until every worker has run one (the pools start
+# workers lazily); returns the seconds since `created` (the pool's construction time),
+# without the time the tasks spent waiting
+def start_workers(pool, max_workers, created, timeout=30.0):
+    seen = set()
+    hold, held = 0.05, 0.0
+    deadline = created + timeout
+    while len(seen) < max_workers and time.perf_counter() < deadline:
+        futures = [pool.submit(_worker_id, hold) for _ in range(max_workers)]
+        seen.update(future.result() for future in futures)
+        held += hold
+        hold *= 2
+    return time.perf_counter() - created - held
@@ -0,0 +1,202 @@
+'''
+Long-lived, pre-warmed worker pools shared across benchmark phases.
+
+Every benchmark run used to create a fresh executor, so the measured time mixed
+process start-up, interpreter start-up and module imports (torch, PIL, NumPy) with
+the per-task work. ``WarmPoolManager`` keeps one pool per (executor type, size) alive
+until it is shut down:
+
+- process pools use the ``forkserver`` start method where available, with
+  ``preload`` modules imported once into the fork server, so every worker starts as
+  a fork of an interpreter that already has them; elsewhere the workers import them
+  on their warm-up task
+- creating a pool submits warm-up tasks until every worker has started and imported
+  ``preload`` (thread pools: until every thread has started; adaptive pools, which
+  only grow under load: until one task has run; subinterpreter pools do not import
+  ``preload``), and records how long that took as the pool's start-up cost
+- ``borrow()`` hides the worker processes of the other, idle pools and the fork server
+  from ``ResourceMonitor``, so a run's CPU and memory readings only cover its own pool
+
+``run_benchmark(pool_manager=...)`` takes its executors from the manager, so the
+measured runs only contain steady-state work and each record gets ``startup_s``.
+``compare_cold_warm()`` runs the same workloads on fresh and on warm pools.
+'''
+import importlib
+import multiprocessing
+import multiprocessing.forkserver
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from Executors.adaptive import AdaptiveThreadPoolExecutor
+from Executors.interpreters import INTERPRETERS, InterpreterPoolExecutor, start_workers
+from Harness.benchmark import run_benchmark, save_results
+from Harness.monitor import ignore_process, unignore_process
+
+
+# warm-up task for process workers: import the preload modules, report the worker pid
+def _warm_process(modules, hold):
+    for name in modules:
+        importlib.import_module(name)
+    time.sleep(hold)      # keep this worker busy so the next warm-up task needs a new one
+    return os.getpid()
+
+
+# warm-up task for thread workers: every thread waits until all of them are running
+def _warm_thread(barrier):
+    try:
+        barrier.wait()
+    except threading.BrokenBarrierError:
+        pass              # pools that grow lazily (AdaptiveThreadPoolExecutor) start fewer
+    return threading.get_ident()
+
+
+# pids of the worker processes of a pool (none for thread pools)
+def _worker_pids(pool):
+    return list(getattr(pool, "_processes", None) or ())
+
+
+class WarmPoolManager:
+
+    def __init__(self, preload=(), start_method=None, warm_timeout=1.0):
+        if start_method is None:
+            methods = multiprocessing.get_all_start_methods()
+            start_method = "forkserver" if "forkserver" in methods else methods[0]
+        self.preload = tuple(preload)
+        self.context = multiprocessing.get_context(start_method)
+        if start_method == "forkserver" and self.preload:
+            # only takes effect if the fork server has not been started yet
+            self.context.set_forkserver_preload(list(self.preload))
+        self.warm_timeout = warm_timeout
+        self._pools = {}
+        self._startup = {}
+
+    # the warm pool for (executor_type, max_workers), created and warmed on first use
+    def get(self, executor_type, max_workers):
+        key = (executor_type, max_workers)
+        if key not in self._pools:
+            start = time.perf_counter()
+            if issubclass(executor_type, ProcessPoolExecutor):
+                pool = executor_type(max_workers=max_workers, mp_context=self.context)
+                self._warm_processes(pool, max_workers)
+                self._ignore_forkserver()
+            elif INTERPRETERS and issubclass(executor_type, InterpreterPoolExecutor):
+                # a barrier cannot be shared with subinterpreters
+                pool = executor_type(max_workers=max_workers)
+                start_workers(pool, max_workers, start)
+            elif issubclass(executor_type, AdaptiveThreadPoolExecutor):
+                # its min_workers threads start in the constructor and more only appear under
+                # load, so a barrier over max_workers threads would always wait out warm_timeout
+                pool = executor_type(max_workers=max_workers)
+                pool.submit(threading.get_ident).result()
+            else:
+                pool = executor_type(max_workers=max_workers)
+                self._warm_threads(pool, max_workers)
+            self._startup[key] = time.perf_counter() - start
+            self._pools[key] = pool
+        return self._pools[key]
+
+    # the warm pool wrapped so that ``with`` / ``shutdown()`` leave it running; the other
+    # pools are idle meanwhile, so their workers are left out of the resource samples
+    def borrow(self, executor_type, max_workers):
+        pool = self.get(executor_type, max_workers)
+        for other in self._pools.values():
+            for pid in _worker_pids(other):
+                if other is pool:
+                    unignore_process(pid)
+                else:
+                    ignore_process(pid)
+        return _Borrowed(pool)
+
+    # seconds it took to start and warm the pool for (executor_type, max_workers)
+    def startup(self, executor_type, max_workers):
+        return self._startup.get((executor_type, max_workers))
+
+    def startup_costs(self):
+        return [{"executor": executor_type.__name__, "workers": workers, "startup_s": seconds}
+                for (executor_type, workers), seconds in self._startup.items()]
+
+    def _warm_processes(self, pool, max_workers):
+        pids = set()
+        hold = 0.05
+        deadline = time.perf_counter() + max(self.warm_timeout, 30.0)
+        while len(pids) < max_workers and time.perf_counter() < deadline:
+            futures = [pool.submit(_warm_process, self.preload, hold) for _ in range(max_workers)]
+            pids.update(future.result() for future in futures)
+            hold *= 2
+
+    # the fork server only forks workers, it does not run tasks
+    def _ignore_forkserver(self):
+        if self.context.get_start_method() == "forkserver":
+            pid = getattr(multiprocessing.forkserver._forkserver, "_forkserver_pid", None)
+            if pid is not None:
+                ignore_process(pid)
+
+    def _warm_threads(self, pool, max_workers):
+        barrier = threading.Barrier(max_workers, timeout=self.warm_timeout)
+        futures = [pool.submit(_warm_thread, barrier) for _ in range(max_workers)]
+        for future in futures:
+            future.result()
+
+    def shutdown(self):
+        for pool in self._pools.values():
+            for pid in _worker_pids(pool):
+                unignore_process(pid)
+            pool.shutdown(wait=True)
+        self._pools.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+
+
+# a pool handed out by the manager must survive ``with executor:`` blocks
+class _Borrowed(Executor):
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def submit(self, fn, /, *args, **kwargs):
+        return self.pool.submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self.pool, name)
+
+
+# the same workloads on a fresh pool per repetition ("cold") and on warm pools ("warm");
+# cold runtimes include pool start-up, warm ones report it once as startup_s
+def compare_cold_warm(workloads, executor_types, pool_sizes, preload=(), repeats=3):
+    cold = run_benchmark(workloads, executor_types, pool_sizes, repeats=repeats, warmup=0)
+    for r in cold:
+        r["pool"] = "cold"
+    with WarmPoolManager(preload) as manager:
+        warm = run_benchmark(workloads, executor_types, pool_sizes, repeats=repeats, warmup=0,
+                             pool_manager=manager)
+    return cold + warm
+
+
+if __name__ == "__main__":
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "CPU"))
+    from native_kernels import limit_blas_threads, numpy_matmul, zlib_compress, MB
+
+    limit_blas_threads()
+    workloads = {
+        "numpy_matmul": (numpy_matmul, [(256,)] * 16),
+        "zlib_compress": (zlib_compress, [(1 * MB, 6)] * 16),
+    }
+    results = compare_cold_warm(workloads, (ThreadPoolExecutor, ProcessPoolExecutor), pool_sizes=(2, 4),
+                                preload=("numpy", "native_kernels"))
+    for r in results:
+        startup = f"{r['startup_s']:.3f}s" if r.get("startup_s") is not None else "-"
+        print(f"{r['workload']:<14} {r['executor']:<20} x{r['workers']} {r['pool']:<4} | "
+              f"runtime {r['runtime_median_s']:.3f}s | {r['throughput_median']:.1f} t/s | "
+              f"start-up {startup}")
+    save_results(results, "results/warm_pool")
@@ -0,0 +1,247 @@
+'''
+Process-based executor with per-worker work ranges and work stealing.
+
+``ProcessPoolExecutor.map`` pushes every chunk through one shared call queue:
+``chunksize=1`` pays a pickle + pipe round-trip per item, and large chunks leave
+stragglers when per-item cost is uneven (``is_prime`` on random inputs,
+``fibonacci`` with mixed ``n``).
+
+``WorkStealingExecutor.map`` ships the inputs to every worker once. Each worker
+owns a contiguous range of input indices, kept in shared memory as ``[lo, hi)``
+(a deque of task indices). The owner takes small batches from the front; a worker
+whose range is empty steals the back half of the busiest worker's range. Results
+come back to the parent once per batch.
+
+``compare()`` runs the prime and fibonacci workloads against
+``ProcessPoolExecutor`` with several chunk sizes and reports makespan and tail
+completion time (makespan minus the time at which 90% of the items were done).
+'''
+import multiprocessing
+import os
+import pickle
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from queue import Empty
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from Harness.benchmark import save_results
+from Harness.stats import percentile
+
+POLL_INTERVAL = 0.1     # seconds between liveness checks while waiting for results
+EXIT_GRACE = 1.0        # seconds a cleanly exited worker's last message may still be in flight
+
+
+# take up to `grain` indices from the front of worker i's range
+def _take(ranges, locks, i, grain):
+    with locks[i]:
+        lo, hi = ranges[2 * i], ranges[2 * i + 1]
+        if lo >= hi:
+            return None
+        end = min(lo + grain, hi)
+        ranges[2 * i] = end
+        return lo, end
+
+
+# steal the back half of the fullest other range into worker i's own range; once the
+# parent has set `stop` (a task failed) the stolen indices are dropped, not published
+def _steal(ranges, locks, i, num_workers, stop):
+    while True:
+        sizes = [(ranges[2 * j + 1] - ranges[2 * j], j) for j in range(num_workers) if j != i]
+        if not sizes:
+            return False
+        size, victim = max(sizes)
+        if size <= 0:
+            return False
+        with locks[victim]:
+            lo, hi = ranges[2 * victim], ranges[2 * victim + 1]
+            if hi - lo <= 0:
+                continue           # the victim drained it meanwhile; look again
+            mid = hi - max(1, (hi - lo) // 2)
+            ranges[2 * victim + 1] = mid
+        with locks[i]:
+            # the parent sets stop before draining, so either it drains this range after
+            # we publish it or we see stop here
+            if stop.value:
+                return False
+            ranges[2 * i], ranges[2 * i + 1] = mid, hi
+        return True
+
+
+# an exception that can be sent to the parent (the queue drops what it cannot pickle)
+def _picklable(error):
+    try:
+        pickle.dumps(error)
+        return error
+    except Exception:
+        return RuntimeError(f"{type(error).__name__}: {error}")
+
+
+# messages to the parent: ("batch", lo, values), ("done", i, steals) or ("error", i, exception)
+def _worker(i, num_workers, fn, inputs, ranges, locks, stop, results, grain):
+    steals = 0
+    try:
+        while True:
+            batch = _take(ranges, locks, i, grain)
+            if batch is None:
+                if not _steal(ranges, locks, i, num_workers, stop):
+                    break
+                steals += 1
+                continue
+            lo, hi = batch
+            values = [fn(inputs[k]) for k in range(lo, hi)]
+            results.put(("batch", lo, values, time.perf_counter()))
+    except Exception as e:
+        results.put(("error", i, _picklable(e), time.perf_counter()))
+        return
+    results.put(("done", i, steals, time.perf_counter()))
+
+
+class WorkStealingExecutor:
+    '''
+    map(fn, iterable) over a fresh set of worker processes with work stealing.
+    ``grain`` is the number of items a worker takes (and reports) at a time.
+    '''
+
+    def __init__(self, max_workers=None, grain=None, mp_context=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.grain = grain
+        self.ctx = mp_context or multiprocessing.get_context()
+        self.last_run = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def map(self, fn, iterable):
+        inputs = list(iterable)
+        n, workers = len(inputs), min(self.max_workers, max(len(inputs), 1))
+        grain = self.grain or max(1, n // (workers * 16))
+        ranges = self.ctx.Array("q", 2 * workers, lock=False)
+        for i in range(workers):
+            ranges[2 * i] = n * i // workers
+            ranges[2 * i + 1] = n * (i + 1) // workers
+        locks = [self.ctx.Lock() for _ in range(workers)]
+        stop = self.ctx.Value("b", 0, lock=False)
+        queue = self.ctx.Queue()
+        self._died = {}
+        start = time.perf_counter()
+        procs = [self.ctx.Process(target=_worker, daemon=True,
+                                  args=(i, workers, fn, inputs, ranges, locks, stop, queue, grain))
+                 for i in range(workers)]
+        for p in procs:
+            p.start()
+        out = [None] * n
+        completions = []
+        steals = 0
+        finished = set()
+        error = None
+        while len(finished) < workers:
+            try:
+                kind, lo, values, t = queue.get(timeout=POLL_INTERVAL)
+            except Empty:
+                self._check_alive(procs, finished)
+                continue
+            if kind == "batch":
+                out[lo:lo + len(values)] = values
+                completions.extend([t - start] * len(values))
+                continue
+            if kind == "error" and error is None:
+                error = values
+                # drain every range so the other workers stop early; stop keeps a thief
+                # from publishing a range it took before the drain
+                stop.value = 1
+                for k in range(workers):
+                    with locks[k]:
+                        ranges[2 * k] = ranges[2 * k + 1]
+            if kind == "done":
+                steals += values
+            finished.add(lo)
+        for p in procs:
+            p.join()
+        if error is not None:
+            raise error
+        self.last_run = {"completions": completions, "steals": steals, "grain": grain}
+        return out
+
+    # a worker that died without reporting (killed, crashed in C code) breaks the run
+    def _check_alive(self, procs, finished):
+        now = time.perf_counter()
+        for i, p in enumerate(procs):
+            if i in finished or p.is_alive():
+                continue
+            # a clean exit may still have its last message in the pipe: allow a grace period
+            died = self._died.setdefault(p.pid, now)
+            if p.exitcode != 0 or now - died > EXIT_GRACE:
+                for other in procs:
+                    if other.is_alive():
+                        other.terminate()
+                raise BrokenProcessPool(f"worker {i} (pid {p.pid}) terminated abruptly "
+                                        f"with exit code {p.exitcode}")
+
+
+# ProcessPoolExecutor with explicit chunks so per-chunk completion times are visible
+def _run_chunk(fn, chunk):
+    return [fn(x) for x in chunk]
+
+
+def process_pool_map(fn, inputs, max_workers, chunksize):
+    chunks = [inputs[i:i + chunksize] for i in range(0, len(inputs), chunksize)]
+    out = [None] * len(chunks)
+    completions = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_run_chunk, fn, chunk): k for k, chunk in enumerate(chunks)}
+        for future in as_completed(futures):
+            out[futures[future]] = future.result()
+            completions.extend([time.perf_counter() - start] * len(chunks[futures[future]]))
+    return [x for chunk in out for x in chunk], completions
+
+
+# makespan, median / p90 item completion and the tail after 90% of items were done
+def completion_stats(completions):
+    makespan = max(completions)
+    p90 = percentile(completions, 90)
+    return {"makespan_s": makespan, "completion_p50_s": percentile(completions, 50),
+            "completion_p90_s": p90, "tail_s": makespan - p90}
+
+
+def compare(workloads, max_workers=4, chunksizes=(1, 8, 32, None), repeats=3):
+    results = []
+    for name, (fn, inputs) in workloads.items():
+        for chunksize in chunksizes:
+            size = chunksize or max(1, len(inputs) // max_workers)
+            for _ in range(repeats):
+                _, completions = process_pool_map(fn, inputs, max_workers, size)
+                results.append({"workload": name, "executor": "ProcessPoolExecutor",
+                                "chunksize": size, **completion_stats(completions)})
+        for _ in range(repeats):
+            executor = WorkStealingExecutor(max_workers)
+            executor.map(fn, inputs)
+            results.append({"workload": name, "executor": "WorkStealingExecutor",
+                            "chunksize": executor.last_run["grain"],
+                            "steals": executor.last_run["steals"],
+                            **completion_stats(executor.last_run["completions"])})
+    return results
+
+
+if __name__ == "__main__":
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "CPU"))
+    from prime import is_prime, generate_numbers
+    from fibonacci_performance import fibonacci
+
+    random.seed(0)
+    workloads = {
+        "is_prime": (is_prime, generate_numbers(1000)),
+        "fibonacci": (fibonacci, [random.randint(20, 30) for _ in range(200)]),
+    }
+    results = compare(workloads, max_workers=4)
+    for r in results:
+        print(f"{r['workload']:<10} {r['executor']:<22} chunk {r['chunksize']:>4} | "
+              f"makespan {r['makespan_s']:.3f}s | p90 {r['completion_p90_s']:.3f}s | "
+              f"tail {r['tail_s']:.3f}s")
+    save_results(results, "results/work_stealing")
@@ -0,0 +1,255 @@
+'''
+Unified benchmark harness for the executor workloads.
+
+A workload registry is a dict mapping a workload name to a ``(func, inputs)`` pair,
+where ``inputs`` is a list of argument tuples (one tuple per task). Workloads whose
+single task processes a whole batch (a copy pipeline, an asyncio fetch loop) may add
+a third element ``items``, the number of items one run handles, so their throughput
+is comparable with the one-task-per-item workloads. ``run_benchmark``
+runs every registered workload on every executor type and pool size, with warm-up
+iterations that are not recorded and a fixed number of measured repetitions.
+
+Timing uses ``time.perf_counter_ns``. Each repetition records the wall time of the
+whole ``with executor(...)`` block and the latency of every task (submit -> done).
+Results are plain dicts so they can be written as JSON or CSV and compared across
+releases.
+'''
+import csv
+import json
+import os
+import platform
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from Executors.chunking import calibrate, chunked_map
+from Harness.instrument import InstrumentedExecutor, summarize_breakdown
+from Harness.monitor import ResourceMonitor, merge_summaries
+from Harness.stats import percentile, confidence_interval
+
+
+# wrap a list of single values into a list of argument tuples
+def single_args(values):
+    return [(value,) for value in values]
+
+
+# record the latency of one task when its future completes
+def _record_latency(latencies, index, submitted_ns):
+    def callback(future):
+        latencies[index] = time.perf_counter_ns() - submitted_ns
+    return callback
+
+
+# run all inputs once on a fresh executor
+# mode "submit" submits one future per task; mode "chunked" batches the inputs with
+# Executors.chunking.chunked_map (auto-sized chunks unless chunksize is given); the
+# chunk-size calibration runs before the tasks and is excluded from the wall time,
+# its duration is returned as calibration_ns
+# returns a dict with the results, wall time (ns), per-task latencies (ns) and,
+# when enabled, the per-task queue/service/transfer breakdown and resource samples
+# with a pool_manager (Executors.warm_pool.WarmPoolManager) the run borrows an already
+# started pool, so the wall time excludes pool start-up; executors with reset_metrics()
+# start counting afresh, so executor_metrics only cover this run
+def run_once(executor_type, num_workers, func, inputs, instrument=False, monitor_interval=None,
+             mode="submit", chunksize=None, pool_manager=None):
+    run = {"latencies_ns": [0] * len(inputs), "breakdown": None, "resources": None}
+    if pool_manager is not None:
+        executor = pool_manager.borrow(executor_type, num_workers)
+    else:
+        executor = executor_type(max_workers=num_workers)
+    if hasattr(executor, "reset_metrics"):
+        executor.reset_metrics()
+    monitor = ResourceMonitor(monitor_interval).start() if monitor_interval else None
+    start = time.perf_counter_ns()
+    excluded_ns = 0
+    with executor as pool:
+        executor = InstrumentedExecutor(pool) if instrument else pool
+        if mode == "chunked":
+            tuner = None
+            if chunksize is None:
+                tuner = calibrate(pool, func, inputs, num_workers)
+                excluded_ns = run["calibration_ns"] = int(tuner.calibration_s * 1e9)
+            run["results"], run["latencies_ns"], run["chunks"] = chunked_map(
+                executor, func, inputs, num_workers, chunksize, tuner=tuner)
+        elif mode == "submit":
+            futures = []
+            for i, args in enumerate(inputs):
+                submitted = time.perf_counter_ns()
+                future = executor.submit(func, *args)
+                future.add_done_callback(_record_latency(run["latencies_ns"], i, submitted))
+                futures.append(future)
+            run["results"] = [future.result() for future in futures]
+        else:
+            raise ValueError(f"Unknown mode {mode!r}. Use 'submit' or 'chunked'.")
+    run["wall_ns"] = time.perf_counter_ns() - start - excluded_ns
+    # executors that adapt at runtime (e.g. AdaptiveThreadPoolExecutor) report their decisions
+    if hasattr(pool, "metrics"):
+        run["executor_metrics"] = pool.metrics()
+    if monitor is not None:
+        monitor.stop()
+        run["resources"] = monitor
+    if instrument:
+        run["breakdown"] = executor.breakdown()
+    return run
+
+
+# turn the raw measurements of one (workload, executor, pool size) cell into a record
+def summarize(workload, executor_type, num_workers, task_num, wall_ns, latencies_ns, warmup):
+    runtimes = [ns / 1e9 for ns in wall_ns]
+    throughputs = [task_num / runtime for runtime in runtimes]
+    latencies_ms = [ns / 1e6 for ns in latencies_ns]
+    runtime_low, runtime_high = confidence_interval(runtimes)
+    throughput_low, throughput_high = confidence_interval(throughputs)
+    return {
+        "workload": workload,
+        "executor": executor_type.__name__,
+        "workers": num_workers,
+        "tasks": task_num,
+        "repeats": len(runtimes),
+        "warmup": warmup,
+        "runtime_median_s": statistics.median(runtimes),
+        "runtime_ci_low_s": runtime_low,
+        "runtime_ci_high_s": runtime_high,
+        "throughput_median": statistics.median(throughputs),
+        "throughput_ci_low": throughput_low,
+        "throughput_ci_high": throughput_high,
+        "latency_median_ms": percentile(latencies_ms, 50),
+        "latency_p95_ms": percentile(latencies_ms, 95),
+        "latency_p99_ms": percentile(latencies_ms, 99),
+        "runtimes_s": runtimes,
+    }
+
+
+# run every workload in the registry on every executor type and pool size
+# mode / chunksize select how tasks reach the pool (see run_once)
+# pool_manager keeps warm pools across runs and workloads; each record then gets the
+# pool's one-off start-up cost as "startup_s", separate from the steady-state runtimes
+# instrument=True adds the median/p95 queueing delay, service time and result
+# transfer time of the measured tasks to each record
+# monitor_interval (seconds) samples CPU/memory of the process tree during every
+# measured run; the summary is added to the record and the time series of each
+# run is kept under "resource_series"
+def run_benchmark(workloads, executor_types=(ThreadPoolExecutor, ProcessPoolExecutor),
+                  pool_sizes=(4,), repeats=5, warmup=1, instrument=False, monitor_interval=None,
+                  mode="submit", chunksize=None, pool_manager=None):
+    results = []
+    for name, (func, inputs, *items) in workloads.items():
+        for executor_type in executor_types:
+            for num_workers in pool_sizes:
+                for _ in range(warmup):
+                    run_once(executor_type, num_workers, func, inputs, mode=mode, chunksize=chunksize,
+                             pool_manager=pool_manager)
+                wall_ns = []
+                latencies_ns = []
+                rows = []
+                monitors = []
+                executor_metrics = []
+                chunks = []
+                calibrations_ns = []
+                for _ in range(repeats):
+                    run = run_once(executor_type, num_workers, func, inputs,
+                                   instrument, monitor_interval, mode, chunksize, pool_manager)
+                    wall_ns.append(run["wall_ns"])
+                    latencies_ns.extend(run["latencies_ns"])
+                    rows.extend(run["breakdown"] or [])
+                    if run["resources"] is not None:
+                        monitors.append(run["resources"])
+                    if "chunks" in run:
+                        chunks.append(len(run["chunks"]))
+                    if "calibration_ns" in run:
+                        calibrations_ns.append(run["calibration_ns"])
+                    if "executor_metrics" in run:
+                        executor_metrics.append(run["executor_metrics"])
+                record = summarize(name, executor_type, num_workers, items[0] if items else len(inputs),
+                                   wall_ns, latencies_ns, warmup)
+                record["mode"] = mode
+                if pool_manager is not None:
+                    record["pool"] = "warm"
+                    record["startup_s"] = pool_manager.startup(executor_type, num_workers)
+                if chunks:
+                    record["chunks_median"] = statistics.median(chunks)
+                if calibrations_ns:
+                    record["calibration_median_s"] = statistics.median(calibrations_ns) / 1e9
+                if instrument:
+                    record.update(summarize_breakdown(rows))
+                if monitors:
+                    record.update(merge_summaries([m.summary() for m in monitors]))
+                    record["resource_series"] = [m.samples for m in monitors]
+                if executor_metrics:
+                    peaks = [m["peak_workers"] for m in executor_metrics if "peak_workers" in m]
+                    if peaks:
+                        record["peak_workers"] = max(peaks)
+                    record["executor_metrics"] = executor_metrics
+                results.append(record)
+    return results
+
+
+# description of the machine the results were measured on
+def environment():
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def write_json(results, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+
+
+# CSV only keeps the scalar columns; per-run series stay in the JSON output
+def write_csv(results, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if not results:
+        return
+    fields = []
+    for r in results:
+        fields.extend(key for key, value in r.items()
+                      if not isinstance(value, (list, dict)) and key not in fields)
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(results)
+
+
+# write <prefix>.json and <prefix>.csv
+def save_results(results, prefix):
+    write_json(results, prefix + ".json")
+    write_csv(results, prefix + ".csv")
+
+
+def print_results(results):
+    for r in results:
+        mode = f" ({r['mode']})" if r.get("mode", "submit") != "submit" else ""
+        warm = " (warm pool)" if r.get("pool") == "warm" else ""
+        print(f"{r['workload']} | {r['executor']} x{r['workers']}{mode}{warm}:")
+        print(f"Execution Time: {r['runtime_median_s']:.4f} s "
+              f"(95% CI {r['runtime_ci_low_s']:.4f}-{r['runtime_ci_high_s']:.4f})")
+        print(f"Throughput: {r['throughput_median']:.4f} tasks/s "
+              f"(95% CI {r['throughput_ci_low']:.4f}-{r['throughput_ci_high']:.4f})")
+        print(f"Task latency: median {r['latency_median_ms']:.2f} ms | "
+              f"p95 {r['latency_p95_ms']:.2f} ms | p99 {r['latency_p99_ms']:.2f} ms")
+        if "cpu_percent_mean" in r:
+            print(f"CPU usage: mean {r['cpu_percent_mean']:.2f}% | peak {r['cpu_percent_peak']:.2f}% "
+                  f"({r['processes_peak']} processes)")
+            print(f"Memory peak: RSS {r['rss_peak_mb']:.2f} MB | USS {r['uss_peak_mb']:.2f} MB | "
+                  f"PSS {r['pss_peak_mb']:.2f} MB")
+            print(f"Context switches: {r['ctx_voluntary']:.0f} voluntary, "
+                  f"{r['ctx_involuntary']:.0f} involuntary | "
+                  f"Page faults: {r['minor_faults']:.0f} minor, {r['major_faults']:.0f} major")
+        if "startup_s" in r:
+            print(f"Pool start-up (once, not in the runtimes): {r['startup_s']:.4f} s")
+        if "calibration_median_s" in r:
+            print(f"Chunk-size calibration (per run, not in the runtimes): median {r['calibration_median_s']:.4f} s")
+        if "peak_workers" in r:
+            decisions = sum(len(m["decisions"]) for m in r["executor_metrics"])
+            print(f"Pool size: peak {r['peak_workers']} workers, {decisions} resizing decisions")
+        if "queue_median_ms" in r:
+            print(f"Queueing delay: median {r['queue_median_ms']:.2f} ms | "
+                  f"Service: median {r['service_median_ms']:.2f} ms | "
+                  f"Transfer: median {r['transfer_median_ms']:.2f} ms")
+        print()
@@ -0,0 +1,197 @@
+'''
+Local, deterministic stand-in for the web servers used by the I/O benchmarks.
+
+``StubServer`` starts a threaded HTTP server in a separate process (so its threads
+do not compete with the client for the benchmark process's GIL) and exposes:
+
+- ``GET /bytes/<n>``: a response body of ``n`` bytes (``/`` uses ``payload_size``)
+- ``GET /__stats``: requests served, connections accepted and errors injected
+
+Every response is delayed by a latency drawn from a seeded distribution:
+
+- ``fixed``: always ``latency`` seconds
+- ``exponential``: mean ``latency`` seconds
+- ``pareto``: heavy-tailed with shape ``alpha`` and mean ``latency`` seconds
+  (optionally capped at ``max_latency``)
+
+A seeded fraction ``error_rate`` of the requests gets a 500 response. The i-th
+request always gets the i-th delay and error draw, so a run with the same seed sees
+the same set of latencies whatever the thread interleaving. ``keep_alive=False``
+makes the server answer with HTTP/1.0 and close every connection, so connection
+reuse in the clients can be switched on and off.
+'''
+import json
+import multiprocessing
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from Harness.monitor import ignore_process, unignore_process
+
+LATENCIES = ("fixed", "exponential", "pareto")
+
+
+class _Draws:
+
+    def __init__(self, latency_kind, latency, alpha, max_latency, error_rate, seed):
+        if latency_kind not in LATENCIES:
+            raise ValueError(f"Unknown latency {latency_kind!r}. Use one of: {', '.join(LATENCIES)}.")
+        if latency_kind == "pareto" and alpha <= 1:
+            raise ValueError("pareto latency needs alpha > 1 for a finite mean")
+        self.kind = latency_kind
+        self.latency = latency
+        self.alpha = alpha
+        self.max_latency = max_latency
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    # (delay in seconds, inject error) for the next request
+    def next(self):
+        with self.lock:
+            if self.kind == "fixed":
+                delay = self.latency
+            elif self.kind == "exponential":
+                delay = self.rng.expovariate(1 / self.latency) if self.latency > 0 else 0.0
+            else:
+                scale = self.latency * (self.alpha - 1) / self.alpha
+                delay = scale * self.rng.paretovariate(self.alpha)
+            error = self.rng.random() < self.error_rate
+        if self.max_latency is not None:
+            delay = min(delay, self.max_latency)
+        return delay, error
+
+
+class _Handler(BaseHTTPRequestHandler):
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.stats_lock:
+            self.server.stats["connections"] += 1
+
+    def do_GET(self):
+        if self.path == "/__stats":
+            with self.server.stats_lock:
+                self.server.stats["connections"] -= 1     # do not count the stats query itself
+                self._send(200, json.dumps(self.server.stats).encode(), "application/json")
+            return
+        path = self.path.split("?", 1)[0]
+        if path.startswith("/bytes/"):
+            try:
+                size = int(path[len("/bytes/"):])
+            except ValueError:
+                self._send(404, b"not found")
+                return
+        elif path == "/":
+            size = self.server.payload_size
+        else:
+            self._send(404, b"not found")
+            return
+        delay, error = self.server.draws.next()
+        if delay:
+            time.sleep(delay)
+        with self.server.stats_lock:
+            self.server.stats["requests"] += 1
+            self.server.stats["errors"] += error
+        if error:
+            self._send(500, b"injected error")
+        else:
+            self._send(200, self.server.payload(size))
+
+    def _send(self, status, body, content_type="application/octet-stream"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if not self.server.keep_alive:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config):
+        self.keep_alive = config["keep_alive"]
+        handler = type("Handler", (_Handler,),
+                       {"protocol_version": "HTTP/1.1" if self.keep_alive else "HTTP/1.0"})
+        super().__init__(address, handler)
+        self.payload_size = config["payload_size"]
+        self.draws = _Draws(config["latency_kind"], config["latency"], config["alpha"],
+                            config["max_latency"], config["error_rate"], config["seed"])
+        self.stats = {"requests": 0, "connections": 0, "errors": 0}
+        self.stats_lock = threading.Lock()
+        self._payloads = {}
+
+    def payload(self, size):
+        body = self._payloads.get(size)
+        if body is None:
+            body = self._payloads[size] = bytes(i % 251 for i in range(size))
+        return body
+
+
+def _serve(host, port, config, conn):
+    server = _Server((host, port), config)
+    conn.send(server.server_address[1])
+    conn.close()
+    server.serve_forever()
+
+
+class StubServer:
+
+    def __init__(self, payload_size=16 * 1024, latency_kind="fixed", latency=0.0, alpha=1.5,
+                 max_latency=None, error_rate=0.0, keep_alive=True, seed=0,
+                 host="127.0.0.1", port=0):
+        self.host = host
+        self.port = port
+        self.config = {
+            "payload_size": payload_size, "latency_kind": latency_kind, "latency": latency,
+            "alpha": alpha, "max_latency": max_latency, "error_rate": error_rate,
+            "keep_alive": keep_alive, "seed": seed,
+        }
+        _Draws(latency_kind, latency, alpha, max_latency, error_rate, seed)  # validate early
+        self._process = None
+
+    def start(self):
+        parent, child = multiprocessing.Pipe(duplex=False)
+        self._process = multiprocessing.Process(
+            target=_serve, args=(self.host, self.port, self.config, child), daemon=True)
+        self._process.start()
+        ignore_process(self._process.pid)   # serving cost is not part of the measured workload
+        child.close()
+        self.port = parent.recv()
+        parent.close()
+        return self
+
+    def stop(self):
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            unignore_process(self._process.pid)
+            self._process = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    # n request URLs; sizes (bytes) are cycled so a list can mix small and large responses
+    def urls(self, n, sizes=None):
+        if not sizes:
+            return [f"{self.url}/?i={i}" for i in range(n)]
+        return [f"{self.url}/bytes/{sizes[i % len(sizes)]}?i={i}" for i in range(n)]
+
+    def stats(self):
+        from urllib.request import urlopen
+        with urlopen(self.url + "/__stats") as response:
+            return json.load(response)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -0,0 +1,163 @@
+'''
+Per-task instrumentation for ThreadPoolExecutor / ProcessPoolExecutor.
+
+``InstrumentedExecutor`` wraps an executor and records, for every future:
+
+- submit:   when ``submit`` was called in the parent
+- start:    when a worker dequeued the task and started running it
+- finish:   when the function returned inside the worker
+- received: when the parent saw the result (future done callback)
+- worker:   ``pid/thread-name`` of the worker that ran it
+
+From these, queueing delay = start - submit, service time = finish - start and
+result transfer = received - finish. For process pools the transfer time includes
+pickling the result and sending it through the result pipe.
+
+All timestamps come from ``time.perf_counter_ns``, which reads the system-wide
+monotonic clock on Linux, macOS and Windows, so timestamps taken in worker
+processes are comparable with the parent's.
+'''
+import csv
+import json
+import os
+import threading
+import time
+from concurrent.futures import Executor, Future
+
+from Harness.stats import percentile
+
+
+# runs inside the worker; must be top-level so process pools can pickle it
+def _timed_call(func, args, kwargs):
+    start = time.perf_counter_ns()
+    result = func(*args, **kwargs)
+    finish = time.perf_counter_ns()
+    worker = f"{os.getpid()}/{threading.current_thread().name}"
+    return result, start, finish, worker
+
+
+class InstrumentedExecutor(Executor):
+    '''
+    Executor wrapper that records submit/start/finish/transfer times per task.
+    Same submit/map/shutdown API as the wrapped executor; records are in ``records``.
+    '''
+
+    def __init__(self, executor):
+        self.executor = executor
+        self.records = []
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter_ns()
+
+    def submit(self, fn, /, *args, **kwargs):
+        outer = Future()
+        with self._lock:
+            task_id = len(self.records)
+            record = {"task": task_id, "func": getattr(fn, "__name__", repr(fn)),
+                      "submit": time.perf_counter_ns()}
+            self.records.append(record)
+        inner = self.executor.submit(_timed_call, fn, args, kwargs)
+        inner.add_done_callback(lambda f: self._complete(f, outer, record))
+        return outer
+
+    def _complete(self, inner, outer, record):
+        record["received"] = time.perf_counter_ns()
+        if inner.cancelled():
+            outer.cancel()
+            outer.set_running_or_notify_cancel()
+            return
+        error = inner.exception()
+        if error is not None:
+            outer.set_exception(error)
+            return
+        result, record["start"], record["finish"], record["worker"] = inner.result()
+        outer.set_result(result)
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        self.executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    # completed tasks with the derived durations, in nanoseconds
+    def breakdown(self):
+        rows = []
+        for r in self.records:
+            if "finish" not in r:
+                continue
+            rows.append({
+                "task": r["task"],
+                "func": r["func"],
+                "worker": r["worker"],
+                "queue_ns": r["start"] - r["submit"],
+                "service_ns": r["finish"] - r["start"],
+                "transfer_ns": r["received"] - r["finish"],
+                "submit_ns": r["submit"] - self._origin,
+                "start_ns": r["start"] - self._origin,
+                "finish_ns": r["finish"] - self._origin,
+                "received_ns": r["received"] - self._origin,
+            })
+        return rows
+
+
+# median/p95 of queueing delay, service time and transfer time in ms
+def summarize_breakdown(rows):
+    summary = {}
+    for key in ("queue", "service", "transfer"):
+        values = [row[key + "_ns"] / 1e6 for row in rows]
+        summary[key + "_median_ms"] = percentile(values, 50)
+        summary[key + "_p95_ms"] = percentile(values, 95)
+    summary["workers_used"] = len({row["worker"] for row in rows})
+    return summary
+
+
+# fixed-width histogram: list of (bin_low, bin_high, count)
+def histogram(values, bins=10):
+    if not values:
+        return []
+    low, high = min(values), max(values)
+    width = (high - low) / bins or 1
+    counts = [0] * bins
+    for value in values:
+        counts[min(int((value - low) / width), bins - 1)] += 1
+    return [(low + i * width, low + (i + 1) * width, count) for i, count in enumerate(counts)]
+
+
+def print_histogram(title, values, bins=10, bar_width=40):
+    print(title)
+    buckets = histogram(values, bins)
+    peak = max((count for _, _, count in buckets), default=0) or 1
+    for low, high, count in buckets:
+        bar = "#" * round(count / peak * bar_width)
+        print(f"{low:10.2f} - {high:10.2f} ms | {count:5d} {bar}")
+    print()
+
+
+# queueing delay vs service time (and result transfer) histograms, in ms
+def print_breakdown(rows, bins=10):
+    for key, title in (("queue", "Queueing delay"), ("service", "Service time"),
+                       ("transfer", "Result transfer")):
+        print_histogram(f"{title} (ms):", [row[key + "_ns"] / 1e6 for row in rows], bins)
+
+
+# Gantt-style timeline: one row per task with start/end offsets per worker
+def write_timeline_csv(rows, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fields = ["task", "func", "worker", "submit_ns", "start_ns", "finish_ns", "received_ns",
+              "queue_ns", "service_ns", "transfer_ns"]
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+# same timeline in Chrome trace-event format (open in chrome://tracing or Perfetto)
+def write_timeline_trace(rows, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    events = []
+    for row in rows:
+        pid, _, thread = row["worker"].partition("/")
+        events.append({"name": row["func"], "cat": "service", "ph": "X",
+                       "ts": row["start_ns"] / 1e3, "dur": row["service_ns"] / 1e3,
+                       "pid": int(pid), "tid": thread, "args": {"task": row["task"]}})
+        events.append({"name": "queued", "cat": "queue", "ph": "X",
+                       "ts": row["submit_ns"] / 1e3, "dur": row["queue_ns"] / 1e3,
+                       "pid": 0, "tid": f"task-{row['task']}"})
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
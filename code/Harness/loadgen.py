@@ -0,0 +1,210 @@
+'''
+Open-loop load generator for the registered workloads.
+
+``run_benchmark`` is closed-loop: it submits a fixed batch and waits for it, so the
+pool never sees more work than the batch and queueing behaviour is hidden. Here
+requests arrive on a schedule that does not depend on how fast the pool completes
+them:
+
+- ``poisson``: exponential inter-arrival times at ``rate`` requests/s
+- ``bursty``: bursts of ``burst`` requests arriving together, bursts at Poisson
+  instants with rate ``rate / burst`` (same mean rate, much larger variance)
+
+Each request runs ``func(*inputs[i % len(inputs)])``. Its sojourn time is measured from
+its *scheduled* arrival to completion, so a dispatcher that falls behind does not hide
+queueing (coordinated omission). A sampler records the number of requests in the
+system (submitted, not completed) every ``sample_interval`` seconds. A request that
+raises, or that the pool refuses to accept, is counted as an error and its sojourn
+time is kept; it does not abort the step.
+
+The p999 sojourn is only reported for steps of at least ``P999_MIN_REQUESTS``
+requests; with fewer samples it would just be the maximum.
+
+``sweep()`` calibrates each pool with one closed-loop run, offers load at fractions of
+that capacity and reports the saturation knee: the highest offered rate at which
+the pool still completes at least ``keep_up`` of the offered rate, fails at most
+``1 - keep_up`` of the requests and its p99 sojourn stays within ``tail_factor``
+times the p99 at the lowest rate. Pools come from a ``WarmPoolManager``, so worker
+start-up is not part of any step.
+'''
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from Executors.warm_pool import WarmPoolManager
+from Harness.benchmark import run_once
+from Harness.stats import percentile
+
+ARRIVALS = ("poisson", "bursty")
+LOADS = (0.25, 0.5, 0.7, 0.8, 0.9, 1.0, 1.1, 1.25)
+# below this many requests the 99.9th percentile is the largest sample
+P999_MIN_REQUESTS = 1000
+
+
+# arrival offsets (seconds from the start) of `count` requests
+def arrival_times(count, rate, kind="poisson", burst=10, seed=0):
+    if kind not in ARRIVALS:
+        raise ValueError(f"Unknown arrival process {kind!r}. Use one of: {', '.join(ARRIVALS)}.")
+    rng = random.Random(seed)
+    size = 1 if kind == "poisson" else burst
+    times = []
+    t = 0.0
+    while len(times) < count:
+        t += rng.expovariate(rate / size)
+        times.extend([t] * min(size, count - len(times)))
+    return times
+
+
+# offer `count` requests to `pool` on the given schedule and wait for all of them
+# returns per-request sojourn times (s), the number of failed requests, the in-system
+# series and the dispatcher lag
+def drive(pool, func, inputs, schedule, sample_interval=0.01):
+    n = len(schedule)
+    sojourn = [0.0] * n
+    finished = [0.0] * n
+    state = {"in_system": 0, "completed": 0, "errors": 0}
+    lock = threading.Lock()
+    all_done = threading.Event()
+    series = []
+    lags = []
+
+    def finish(index, arrival, failed):
+        now = time.perf_counter()
+        sojourn[index] = now - arrival
+        finished[index] = now
+        with lock:
+            state["errors"] += failed
+            state["in_system"] -= 1
+            state["completed"] += 1
+            if state["completed"] == n:
+                all_done.set()
+
+    def done(index, arrival):
+        def callback(future):
+            finish(index, arrival, future.cancelled() or future.exception() is not None)
+        return callback
+
+    def sample():
+        while not all_done.wait(sample_interval):
+            series.append((time.perf_counter() - start, state["in_system"]))
+
+    start = time.perf_counter()
+    sampler = threading.Thread(target=sample, name="loadgen-sampler", daemon=True)
+    sampler.start()
+    for i, offset in enumerate(schedule):
+        arrival = start + offset
+        delay = arrival - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        lags.append(max(time.perf_counter() - arrival, 0.0))
+        with lock:
+            state["in_system"] += 1
+        try:
+            future = pool.submit(func, *inputs[i % len(inputs)])
+        except Exception:
+            # rejected at admission (e.g. BoundedExecutor's QueueFullError): a failed request
+            finish(i, arrival, True)
+            continue
+        future.add_done_callback(done(i, arrival))
+    all_done.wait()
+    sampler.join()
+    return {"sojourn_s": sojourn, "errors": state["errors"], "elapsed_s": max(finished) - start,
+            "series": series, "lags_s": lags}
+
+
+# one open-loop step: `count` requests at `rate` requests/s on a pool
+def run_open_loop(pool, func, inputs, rate, count=200, arrival="poisson", burst=10, seed=0,
+                  sample_interval=0.01):
+    schedule = arrival_times(count, rate, arrival, burst, seed)
+    run = drive(pool, func, inputs, schedule, sample_interval)
+    sojourn_ms = [s * 1e3 for s in run["sojourn_s"]]
+    depths = [depth for _, depth in run["series"]] or [0]
+    return {
+        "arrival": arrival,
+        "offered_rate": rate,
+        # the rate this particular schedule actually offered (a finite Poisson sample
+        # deviates from `rate`); keeping up is judged against it
+        "offered_realized": count / schedule[-1],
+        "requests": count,
+        "achieved_rate": count / run["elapsed_s"],
+        "errors": run["errors"],
+        "error_rate": run["errors"] / count,
+        "sojourn_p50_ms": percentile(sojourn_ms, 50),
+        "sojourn_p99_ms": percentile(sojourn_ms, 99),
+        "sojourn_p999_ms": percentile(sojourn_ms, 99.9) if count >= P999_MIN_REQUESTS else None,
+        "sojourn_max_ms": max(sojourn_ms),
+        "queue_depth_mean": sum(depths) / len(depths),
+        "queue_depth_max": max(depths),
+        "dispatch_lag_p99_ms": percentile([lag * 1e3 for lag in run["lags_s"]], 99),
+        "queue_depth_series": run["series"],
+    }
+
+
+# the highest offered rate at which the pool keeps up (completes and does not fail
+# requests) and its tail has not blown up
+def saturation_knee(steps, keep_up=0.95, tail_factor=10.0):
+    if not steps:
+        return None
+    base_p99 = steps[0]["sojourn_p99_ms"]
+    knee = None
+    for step in steps:
+        if step["achieved_rate"] < keep_up * step["offered_realized"]:
+            break
+        if step["error_rate"] > 1 - keep_up:
+            break
+        if step["sojourn_p99_ms"] > tail_factor * base_p99:
+            break
+        knee = step["offered_rate"]
+    return knee
+
+
+# every workload of a registry (name -> (func, inputs[, items])) on every executor type
+# and pool size, at `loads` x the pool's closed-loop capacity
+# returns one record per step and one summary per (workload, executor, workers)
+def sweep(workloads, executor_types=(ThreadPoolExecutor, ProcessPoolExecutor), pool_sizes=(4,),
+          loads=LOADS, count=200, arrival="poisson", burst=10, seed=0, keep_up=0.95, tail_factor=10.0,
+          pool_manager=None):
+    steps, knees = [], []
+    manager = pool_manager or WarmPoolManager()
+    try:
+        for name, (func, inputs, *_) in workloads.items():
+            for executor_type in executor_types:
+                for num_workers in pool_sizes:
+                    pool = manager.get(executor_type, num_workers)
+                    calibration = run_once(executor_type, num_workers, func, inputs, pool_manager=manager)
+                    capacity = len(inputs) / (calibration["wall_ns"] / 1e9)
+                    group = []
+                    for load in loads:
+                        step = run_open_loop(pool, func, inputs, load * capacity, count, arrival, burst, seed)
+                        step.update({"workload": name, "executor": executor_type.__name__,
+                                     "workers": num_workers, "load": load, "capacity": capacity})
+                        group.append(step)
+                    steps.extend(group)
+                    knee = saturation_knee(group, keep_up, tail_factor)
+                    knees.append({"workload": name, "executor": executor_type.__name__,
+                                  "workers": num_workers, "arrival": arrival, "capacity": capacity,
+                                  "knee_rate": knee, "knee_load": knee / capacity if knee else None,
+                                  "startup_s": manager.startup(executor_type, num_workers)})
+    finally:
+        if pool_manager is None:
+            manager.shutdown()
+    return steps, knees
+
+
+def print_sweep(steps, knees):
+    print(f"{'workload':>12} {'executor':>20} {'workers':>7} {'load':>5} {'offered':>9} {'achieved':>9} "
+          f"{'p50 ms':>8} {'p99 ms':>8} {'p999 ms':>8} {'depth max':>9} {'errors':>6}")
+    for s in steps:
+        # p999 is left out of short steps, where it would only repeat the maximum
+        p999 = f"{s['sojourn_p999_ms']:>8.1f}" if s["sojourn_p999_ms"] is not None else f"{'n/a':>8}"
+        print(f"{s['workload']:>12} {s['executor']:>20} {s['workers']:>7} {s['load']:>5.2f} "
+              f"{s['offered_realized']:>9.1f} {s['achieved_rate']:>9.1f} {s['sojourn_p50_ms']:>8.1f} "
+              f"{s['sojourn_p99_ms']:>8.1f} {p999} {s['queue_depth_max']:>9} {s['errors']:>6}")
+    for k in knees:
+        if k["knee_rate"]:
+            knee = f"{k['knee_rate']:.1f} req/s ({k['knee_load']:.0%} of capacity)"
+        else:
+            knee = "below the lowest load"
+        print(f"{k['workload']} | {k['executor']} x{k['workers']} ({k['arrival']}): "
+              f"capacity {k['capacity']:.1f} req/s, knee {knee}")
@@ -0,0 +1,221 @@
+'''
+Background resource monitor for benchmark runs.
+
+``ResourceMonitor`` is a daemon thread that polls at a fixed interval across the
+current process and all of its children (so ProcessPoolExecutor workers are
+counted). Each sample holds:
+
+- system-wide CPU % per core and the CPU % of the whole process tree
+- RSS / USS / PSS of the process tree (USS/PSS where the platform provides them)
+- voluntary and involuntary context switches, minor and major page faults
+  (cumulative since the monitor started). Live processes are read on every poll;
+  when monitoring this process, children that exit and are reaped (e.g. pool
+  workers joined at shutdown) are counted in full through ``getrusage``
+  (``RUSAGE_CHILDREN``), so nothing after their last poll is lost. Grandchildren
+  reaped by a child that is still running (fork server workers) only count up to
+  their last poll.
+
+Helper processes that are not part of the workload (e.g. the local HTTP stand-in
+server from ``Harness/http_stub.py``) register with ``ignore_process(pid)`` and are
+left out of every sample.
+
+Usage::
+
+    with ResourceMonitor(interval=0.05) as monitor:
+        run_workload()
+    monitor.samples    # time series
+    monitor.summary()  # peaks / means / totals
+'''
+import os
+import threading
+import time
+
+import psutil
+
+try:
+    import resource
+except ImportError:          # Windows
+    resource = None
+
+_ignored = set()
+
+
+# leave a helper process out of the samples of every monitor
+def ignore_process(pid):
+    _ignored.add(pid)
+
+
+def unignore_process(pid):
+    _ignored.discard(pid)
+
+
+# (minor, major) page faults of a process; the source differs per platform
+def _page_faults(proc):
+    info = proc.memory_info()
+    if hasattr(info, "num_page_faults"):         # Windows
+        return info.num_page_faults, 0
+    if hasattr(info, "pfaults"):                 # macOS
+        return info.pfaults, info.pageins
+    try:                                         # Linux: minflt / majflt from /proc
+        with open(f"/proc/{proc.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return int(fields[7]), int(fields[9])
+    except (OSError, IndexError, ValueError):
+        return 0, 0
+
+
+# (voluntary, involuntary, minor faults, major faults) of all reaped children of this process
+def _reaped_counters():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_nvcsw, usage.ru_nivcsw, usage.ru_minflt, usage.ru_majflt
+
+
+class ResourceMonitor:
+
+    def __init__(self, interval=0.1, pid=None):
+        self.interval = interval
+        self.root = psutil.Process(pid)
+        self.samples = []
+        self._procs = {}
+        self._last_counters = {}     # pid -> (ppid, counters) at its last poll
+        self._totals = [0, 0, 0, 0]  # voluntary, involuntary, minor faults, major faults
+        # only this process can see its own reaped children's usage
+        self._reaped = None
+        self._own_tree = resource is not None and self.root.pid == os.getpid()
+        self._stop = threading.Event()
+        self._thread = None
+        self._start = None
+
+    def start(self):
+        self._start = time.perf_counter()
+        psutil.cpu_percent(percpu=True)  # prime the per-core counters
+        self._poll(record=False)
+        self._thread = threading.Thread(target=self._run, name="ResourceMonitor", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._poll()
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._poll()
+
+    # the root process plus every live descendant (ignored ones included, their counters
+    # are still tracked), reusing Process objects so that cpu_percent() measures the
+    # interval since the previous poll
+    def _tree(self):
+        try:
+            current = [self.root] + self.root.children(recursive=True)
+        except psutil.NoSuchProcess:
+            current = []
+        procs = {}
+        for proc in current:
+            procs[proc.pid] = self._procs.get(proc.pid, proc)
+        self._procs = procs
+        return list(procs.values())
+
+    def _poll(self, record=True):
+        sample = {"t": time.perf_counter() - self._start, "cpu_percent": 0.0,
+                  "rss": 0, "uss": 0, "pss": 0, "processes": 0}
+        tree = self._tree()
+        # processes still listed keep their entry even if they cannot be read right now
+        # (zombies), so they are only settled once they have been reaped
+        counters_now = {proc.pid: self._last_counters[proc.pid] for proc in tree
+                        if proc.pid in self._last_counters}
+        for proc in tree:
+            ignored = proc.pid in _ignored
+            try:
+                with proc.oneshot():
+                    ppid = proc.ppid()
+                    ctx = proc.num_ctx_switches()
+                    minor, major = _page_faults(proc)
+                    if not ignored:
+                        cpu = proc.cpu_percent(interval=None)
+                        try:
+                            mem = proc.memory_full_info()
+                        except psutil.AccessDenied:
+                            mem = proc.memory_info()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+            counters = (ctx.voluntary, ctx.involuntary, minor, major)
+            # processes that appear after the first poll started during the run: count them
+            # from zero
+            _, last = self._last_counters.get(proc.pid, (ppid, counters if not record else (0, 0, 0, 0)))
+            counters_now[proc.pid] = (ppid, counters)
+            if ignored:
+                continue
+            sample["cpu_percent"] += cpu
+            sample["rss"] += mem.rss
+            sample["uss"] += getattr(mem, "uss", 0)
+            sample["pss"] += getattr(mem, "pss", 0)
+            sample["processes"] += 1
+            for i in range(4):
+                self._totals[i] += max(counters[i] - last[i], 0)
+        if self._own_tree:
+            # reaped children add their lifetime totals to RUSAGE_CHILDREN; take off what
+            # was already counted (or, for ignored ones, never counted) from their polls
+            reaped = _reaped_counters()
+            if self._reaped is not None:
+                for i in range(4):
+                    self._totals[i] += reaped[i] - self._reaped[i]
+                for pid, (ppid, counters) in self._last_counters.items():
+                    if pid not in counters_now and ppid == self.root.pid:
+                        for i in range(4):
+                            self._totals[i] -= counters[i]
+            self._reaped = reaped
+        self._last_counters = counters_now
+        sample["per_core"] = psutil.cpu_percent(percpu=True)
+        (sample["ctx_voluntary"], sample["ctx_involuntary"],
+         sample["minor_faults"], sample["major_faults"]) = self._totals
+        if record:
+            self.samples.append(sample)
+
+    def summary(self):
+        if not self.samples:
+            return {}
+        cores = len(self.samples[0]["per_core"])
+        last = self.samples[-1]
+        return {
+            "cpu_percent_mean": sum(s["cpu_percent"] for s in self.samples) / len(self.samples),
+            "cpu_percent_peak": max(s["cpu_percent"] for s in self.samples),
+            "per_core_mean": [sum(s["per_core"][i] for s in self.samples) / len(self.samples)
+                              for i in range(cores)],
+            "rss_peak_mb": max(s["rss"] for s in self.samples) / (1024 ** 2),
+            "uss_peak_mb": max(s["uss"] for s in self.samples) / (1024 ** 2),
+            "pss_peak_mb": max(s["pss"] for s in self.samples) / (1024 ** 2),
+            "processes_peak": max(s["processes"] for s in self.samples),
+            "ctx_voluntary": last["ctx_voluntary"],
+            "ctx_involuntary": last["ctx_involuntary"],
+            "minor_faults": last["minor_faults"],
+            "major_faults": last["major_faults"],
+        }
+
+
+# combine the summaries of several runs: means are averaged, peaks take the
+# maximum and counters are averaged per run
+def merge_summaries(summaries):
+    summaries = [s for s in summaries if s]
+    if not summaries:
+        return {}
+    n = len(summaries)
+    merged = {}
+    for key in summaries[0]:
+        values = [s[key] for s in summaries]
+        if key == "per_core_mean":
+            merged[key] = [sum(core) / n for core in zip(*values)]
+        elif "peak" in key:
+            merged[key] = max(values)
+        else:
+            merged[key] = sum(values) / n
+    return merged
@@ -0,0 +1,49 @@
+'''
+Summary statistics shared by the harness modules.
+'''
+import math
+import statistics
+
+# two-sided 95% critical values of Student's t distribution, by degrees of freedom
+T_95 = {
+    1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365,
+    8: 2.306, 9: 2.262, 10: 2.228, 11: 2.201, 12: 2.179, 13: 2.160, 14: 2.145,
+    15: 2.131, 16: 2.120, 17: 2.110, 18: 2.101, 19: 2.093, 20: 2.086, 21: 2.080,
+    22: 2.074, 23: 2.069, 24: 2.064, 25: 2.060, 26: 2.056, 27: 2.052, 28: 2.048,
+    29: 2.045, 30: 2.042,
+}
+
+
+# percentile with linear interpolation between closest ranks (q in [0, 100])
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q / 100
+    low = math.floor(pos)
+    high = math.ceil(pos)
+    if low == high:
+        return ordered[low]
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+# 95% confidence interval of the mean
+def confidence_interval(values):
+    if len(values) < 2:
+        mean = values[0] if values else float("nan")
+        return mean, mean
+    mean = statistics.mean(values)
+    t = T_95.get(len(values) - 1, 1.96)
+    half_width = t * statistics.stdev(values) / math.sqrt(len(values))
+    return mean - half_width, mean + half_width
+
+
+# Jain's fairness index: 1.0 when all values are equal, 1/n when one value dominates
+def jain_index(values):
+    values = [v for v in values if v is not None]
+    if not values:
+        return float("nan")
+    square_sum = sum(v * v for v in values)
+    if square_sum == 0:
+        return 1.0
+    return sum(values) ** 2 / (len(values) * square_sum)
@@ -0,0 +1,227 @@
+import asyncio
+import socket
+import ssl
+import time
+from urllib.parse import urljoin, urlsplit
+
+from Harness.stats import percentile
+
+# 基于 asyncio 的 HTTP 抓取引擎（只用标准库）
+#
+# eval_web.py 中的 fetch_url() 每次都调用 requests.get 而没有 Session，200 个请求
+# 每个都要重新建立 TCP/TLS 连接，并发度也受限于 max_workers=10 个线程。这里：
+# - ConnectionPool 为每个 (scheme, host, port) 保存空闲的 keep-alive 连接并复用
+# - fetch_all() 用一个 asyncio.Semaphore 限制总并发数，可选 per_host 限制每个主机的并发
+# - 每个请求记录 DNS、连接（含 TLS 握手）、TTFB、读取响应体的时间，以及连接是否复用
+# 只实现基准测试需要的 HTTP/1.1 GET：Content-Length、chunked 和读到连接关闭三种响应体，
+# 以及最多 max_redirects 次重定向。
+
+USER_AGENT = "Projec_ECS251-bench/1.0"
+REDIRECTS = (301, 302, 303, 307, 308)
+
+
+class ConnectionPool:
+
+    def __init__(self):
+        self._idle = {}          # (scheme, host, port) -> [(reader, writer), ...]
+        self._ssl = ssl.create_default_context()
+        self.opened = 0
+        self.reused = 0
+
+    async def acquire(self, scheme, host, port, timing):
+        idle = self._idle.get((scheme, host, port))
+        while idle:
+            reader, writer = idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                self.reused += 1
+                timing["reused"] = True
+                return reader, writer
+            writer.close()
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        timing["dns_ms"] += (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        error = None
+        for family, _, _, _, address in infos:
+            try:
+                reader, writer = await asyncio.open_connection(
+                    address[0], address[1], family=family,
+                    ssl=self._ssl if scheme == "https" else None,
+                    server_hostname=host if scheme == "https" else None)
+                break
+            except OSError as e:
+                error = e
+        else:
+            raise error or ConnectionError(f"cannot resolve {host}")
+        timing["connect_ms"] += (time.perf_counter() - start) * 1000
+        self.opened += 1
+        timing["reused"] = False
+        return reader, writer
+
+    def release(self, scheme, host, port, reader, writer, keep_alive):
+        if keep_alive and not writer.is_closing():
+            self._idle.setdefault((scheme, host, port), []).append((reader, writer))
+        else:
+            writer.close()
+
+    async def close(self):
+        for connections in self._idle.values():
+            for _, writer in connections:
+                writer.close()
+        self._idle.clear()
+
+
+# 读取响应：返回 (状态码, 头部, 响应体字节数, 是否可以复用连接)
+async def _read_response(reader, timing, sent):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError("connection closed before response")
+    timing["ttfb_ms"] = (time.perf_counter() - sent) * 1000
+    version, status = status_line.decode("latin-1").split(None, 2)[:2]
+    status = int(status)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+
+    body_start = time.perf_counter()
+    size = 0
+    until_close = False
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        while True:
+            n = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+            if n == 0:
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                break
+            size += len(await reader.readexactly(n))
+            await reader.readexactly(2)
+    elif "content-length" in headers:
+        remaining = int(headers["content-length"])
+        while remaining:
+            data = await reader.read(min(remaining, 65536))
+            if not data:
+                raise asyncio.IncompleteReadError(b"", remaining)
+            size += len(data)
+            remaining -= len(data)
+    elif status in (204, 304) or 100 <= status < 200:
+        pass
+    else:
+        until_close = True
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            size += len(data)
+    timing["body_ms"] = (time.perf_counter() - body_start) * 1000
+    keep_alive = (version == "HTTP/1.1" and not until_close
+                  and headers.get("connection", "").lower() != "close")
+    return status, headers, size, keep_alive
+
+
+# 在一个（可能复用的）连接上发送一次 GET；复用的连接已被服务器关闭时换新连接重试一次
+async def _request(pool, url, timing):
+    parts = urlsplit(url)
+    scheme = parts.scheme or "http"
+    host = parts.hostname
+    port = parts.port or (443 if scheme == "https" else 80)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    host_header = host if parts.port is None else f"{host}:{parts.port}"
+    request = (f"GET {path} HTTP/1.1\r\nHost: {host_header}\r\nUser-Agent: {USER_AGENT}\r\n"
+               f"Accept: */*\r\nConnection: keep-alive\r\n\r\n").encode("latin-1")
+    for attempt in range(2):
+        reader, writer = await pool.acquire(scheme, host, port, timing)
+        try:
+            sent = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status, headers, size, keep_alive = await _read_response(reader, timing, sent)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            writer.close()
+            if timing["reused"] and attempt == 0:
+                continue
+            raise
+        except BaseException:
+            writer.close()
+            raise
+        pool.release(scheme, host, port, reader, writer, keep_alive)
+        return status, headers, size
+
+
+# 抓取一个 URL（跟随重定向），返回包含各阶段耗时的记录
+async def fetch(pool, url, timeout=10, max_redirects=5):
+    timing = {"url": url, "status": None, "error": None, "bytes": 0, "redirects": 0,
+              "dns_ms": 0.0, "connect_ms": 0.0, "ttfb_ms": 0.0, "body_ms": 0.0, "reused": False}
+
+    async def follow():
+        current = url
+        while True:
+            status, headers, size = await _request(pool, current, timing)
+            if status not in REDIRECTS or "location" not in headers \
+                    or timing["redirects"] >= max_redirects:
+                return status, size
+            current = urljoin(current, headers["location"])
+            timing["redirects"] += 1
+
+    start = time.perf_counter()
+    try:
+        timing["status"], timing["bytes"] = await asyncio.wait_for(follow(), timeout)
+    except asyncio.TimeoutError:
+        timing["error"] = "Timeout error"
+    except (ConnectionError, OSError):
+        timing["error"] = "Connection error"
+    except Exception as e:
+        timing["error"] = f"Error - {e}"
+    timing["total_ms"] = (time.perf_counter() - start) * 1000
+    return timing
+
+
+async def _fetch_all(urls, concurrency, timeout, per_host):
+    pool = ConnectionPool()
+    limit = asyncio.Semaphore(concurrency)
+    host_limits = {}
+
+    async def one(url):
+        host = urlsplit(url).netloc
+        if per_host and host not in host_limits:
+            host_limits[host] = asyncio.Semaphore(per_host)
+        async with limit:
+            if per_host:
+                async with host_limits[host]:
+                    return await fetch(pool, url, timeout)
+            return await fetch(pool, url, timeout)
+
+    try:
+        records = await asyncio.gather(*(one(url) for url in urls))
+    finally:
+        await pool.close()
+    return records, {"connections_opened": pool.opened, "connections_reused": pool.reused}
+
+
+# 并发抓取所有 URL，返回 (每个请求的记录, 连接池统计)
+def fetch_all(urls, concurrency=10, timeout=10, per_host=None):
+    return asyncio.run(_fetch_all(list(urls), concurrency, timeout, per_host))
+
+
+# 和 fetch_url() 一样的返回格式："url: 状态码" 或 "url: 错误"
+def fetch_all_status(urls, concurrency=10, timeout=10):
+    records, _ = fetch_all(urls, concurrency, timeout)
+    return [f"{r['url']}: {r['status'] if r['error'] is None else r['error']}" for r in records]
+
+
+# 各阶段耗时的中位数和 p95（毫秒），以及连接复用比例
+def summarize_timings(records):
+    ok = [r for r in records if r["error"] is None]
+    summary = {"requests": len(records), "errors": len(records) - len(ok),
+               "reused_ratio": sum(r["reused"] for r in ok) / len(ok) if ok else 0.0}
+    for phase in ("dns", "connect", "ttfb", "body", "total"):
+        values = [r[phase + "_ms"] for r in ok]
+        summary[phase + "_median_ms"] = percentile(values, 50)
+        summary[phase + "_p95_ms"] = percentile(values, 95)
+    return summary
@@ -0,0 +1,124 @@
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# 并行生成文件 I/O 基准测试的数据集
+#
+# file.py 原来的 generate_large_file() 串行地为每个文件调用一次
+# os.urandom(size_in_mb * 1024 * 1024)，每个文件都需要一个整文件大小的缓冲区。这里：
+# - 多个文件用进程池并行生成
+# - 每个文件先预分配大小，再通过 mmap 分块写入，内存只需一个块
+# - 内容来自 SHAKE-128 的可扩展输出（hashlib，C 实现，只依赖标准库），每个块的输入是
+#   (seed, 文件序号, 块偏移)，同样的 (seed, 文件序号, 块大小) 在任何环境下都生成同样的内容
+# - kind 可选 random（不可压缩）、compressible（16 个字母组成的文本）、
+#   sparse（带空洞的稀疏文件，每 sparse_stride 字节只写一个块）
+# - generate_matrix() 按 文件数 x 文件大小 的组合生成多组数据集，并写出 manifest.json
+
+CHUNK_SIZE = 4 * 1024 * 1024
+KINDS = ("random", "compressible", "sparse")
+GENERATOR = "shake_128"      # 写入 manifest，说明内容是怎样生成的
+
+# 随机字节的低 4 位映射到 16 个字母 a-p
+_TEXT_TABLE = bytes(ord('a') + (b & 0x0F) for b in range(256))
+
+
+# 一个块的内容只由 (seed, 文件序号, 块偏移) 决定
+def _random_bytes(seed, index, offset, n):
+    return hashlib.shake_128(f"{seed}:{index}:{offset}".encode()).digest(n)
+
+
+def _text_bytes(seed, index, offset, n):
+    return _random_bytes(seed, index, offset, n).translate(_TEXT_TABLE)
+
+
+# 预分配文件大小；支持时用 posix_fallocate 真正分配磁盘块
+def _preallocate(f, size, sparse):
+    f.truncate(size)
+    if not sparse and hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(f.fileno(), 0, size)
+        except OSError:
+            pass
+
+
+# 生成一个文件，返回写入 manifest 的描述
+def generate_file(path, size_bytes, seed=0, index=0, kind="random", chunk_size=CHUNK_SIZE,
+                  sparse_stride=64 * 1024 * 1024):
+    if kind not in KINDS:
+        raise ValueError(f"Unknown kind {kind!r}. Use one of: {', '.join(KINDS)}.")
+    start = time.perf_counter()
+    with open(path, 'w+b') as f:
+        _preallocate(f, size_bytes, kind == "sparse")
+        if size_bytes:
+            with mmap.mmap(f.fileno(), size_bytes) as mm:
+                if kind == "sparse":
+                    offsets = range(0, size_bytes, sparse_stride)
+                else:
+                    offsets = range(0, size_bytes, chunk_size)
+                for offset in offsets:
+                    n = min(chunk_size, size_bytes - offset)
+                    if kind == "compressible":
+                        mm[offset:offset + n] = _text_bytes(seed, index, offset, n)
+                    else:
+                        mm[offset:offset + n] = _random_bytes(seed, index, offset, n)
+                mm.flush()
+    return {"path": path, "size_bytes": size_bytes, "kind": kind, "seed": seed, "index": index,
+            "chunk_size": chunk_size, "seconds": time.perf_counter() - start}
+
+
+# 并行生成 count 个大小为 size_mb 的文件，文件名为 name_pattern.format(i=...)
+def generate_dataset(directory, count=10, size_mb=100, kind="random", seed=0,
+                     name_pattern="big_file_{i}.txt", max_workers=None, chunk_size=CHUNK_SIZE):
+    os.makedirs(directory, exist_ok=True)
+    size = int(size_mb * 1024 * 1024)
+    paths = [os.path.join(directory, name_pattern.format(i=i)) for i in range(count)]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(generate_file, path, size, seed, i, kind, chunk_size)
+                   for i, path in enumerate(paths)]
+        return [future.result() for future in futures]
+
+
+# 按 文件数 x 文件大小 x 类型 的组合生成数据集，每组一个子目录，并写出 manifest.json
+def generate_matrix(directory, counts=(10,), sizes_mb=(100,), kinds=("random",), seed=0,
+                    max_workers=None):
+    manifest = {"seed": seed, "generator": GENERATOR, "datasets": []}
+    for kind in kinds:
+        for count in counts:
+            for size_mb in sizes_mb:
+                subdir = os.path.join(directory, f"{kind}_{count}x{size_mb:g}mb")
+                start = time.perf_counter()
+                files = generate_dataset(subdir, count, size_mb, kind, seed,
+                                         name_pattern="file_{i}.bin", max_workers=max_workers)
+                manifest["datasets"].append({
+                    "directory": subdir, "kind": kind, "count": count, "size_mb": size_mb,
+                    "seconds": time.perf_counter() - start, "files": files,
+                })
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate file I/O benchmark datasets.")
+    parser.add_argument("--out", default="./data")
+    parser.add_argument("--count", type=int, nargs="+", default=[10])
+    parser.add_argument("--size-mb", type=float, nargs="+", default=[100])
+    parser.add_argument("--kind", choices=KINDS, nargs="+", default=["random"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    manifest = generate_matrix(args.out, args.count, args.size_mb, args.kind, args.seed, args.workers)
+    for d in manifest["datasets"]:
+        total_mb = d["count"] * d["size_mb"]
+        print(f"{d['directory']}: {d['count']} files, {total_mb:.0f} MB in {d['seconds']:.2f} s "
+              f"({total_mb / d['seconds']:.0f} MB/s)")
+
+
+if __name__ == "__main__":
+    main()
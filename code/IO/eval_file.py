@@ -1,8 +1,13 @@
 import os
+import sys
 from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 # import concurrent.futures
-import time
-import psutil
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from Executors.adaptive import AdaptiveThreadPoolExecutor
+from Harness.benchmark import run_benchmark, single_args, print_results, save_results
+from shm_file import SharedFileBuffers, read_into_shm, write_from_shm, write_from_mmap
+from stream_copy import copy_file_kernel, copy_file_streaming, pipeline_copy
 
 # 读取文件内容
 def read_file(filename):
@@ -14,38 +19,33 @@ def write_file(data, filename):
     with open(filename, 'wb') as f:
         f.write(data)
 
-# 统一测试函数
-def performance(executor_type, num_workers, task, file_list, out_file_list=None):
-    start_time = time.time()
-    process = psutil.Process()
-    initial_cpu = process.cpu_percent(interval=None)
-    initial_memory = process.memory_info().rss
-
-    if task == "read":
-        results = execute(executor_type, num_workers, read_file, file_list)
-    elif task == "write":
-        results = execute(executor_type, num_workers, write_file, file_list, out_file_list)
-    else:
-        raise ValueError("Unknown task type. Use 'read' or 'write'.")
-
-    end_time = time.time()
-    final_cpu = process.cpu_percent(interval=None)
-    final_memory = process.memory_info().rss
-
-    runtime = end_time - start_time
-    throughput = len(file_list) / runtime
-    cpu = final_cpu - initial_cpu
-    mem = (final_memory - initial_memory) / (1024 ** 2)  # MB
-
-    return runtime, throughput, cpu, mem
-
-# 统一执行函数
-def execute(executor_type, num_workers, func, file_list, out_file_list=None):
-    with executor_type(max_workers=num_workers) as executor:
-        if out_file_list:
-            executor.map(func, file_list, out_file_list)  # 适用于写文件（有两个参数）
-        else:
-            return list(executor.map(func, file_list))  # 适用于读文件（只有一个参数）
+# 注册读/写工作负载：名称 -> (函数, 参数元组列表)
+# 写任务需要真实数据，所以先在主进程中读入文件内容
+def workloads(file_list, out_file_list):
+    contents = [read_file(f) for f in file_list]
+    return {
+        "read": (read_file, single_args(file_list)),
+        "write": (write_file, list(zip(contents, out_file_list))),
+    }
+
+# 零拷贝版本：worker 之间只传递共享内存句柄或文件名，主进程不持有文件内容
+def zero_copy_workloads(file_list, out_file_list, buffers):
+    return {
+        "read_shm": (read_into_shm, buffers.read_args()),
+        "write_shm": (write_from_shm, buffers.write_args(out_file_list)),
+        "write_mmap": (write_from_mmap, list(zip(file_list, out_file_list))),
+    }
+
+# 流式复制工作负载：不把整个文件读进内存，峰值内存与数据集大小无关
+# copy_pipeline 是一次完整的 读线程 -> 有界队列 -> 写线程 流水线（单个任务）
+def streaming_workloads(file_list, out_file_list, chunk_size=1024 * 1024):
+    pairs = list(zip(file_list, out_file_list))
+    return {
+        "copy_kernel": (copy_file_kernel, pairs),
+        "copy_streaming": (copy_file_streaming, [(f, out, chunk_size) for f, out in pairs]),
+        "copy_pipeline": (pipeline_copy, [(file_list, out_file_list, 2, 2, chunk_size, 8)],
+                          len(file_list)),
+    }
 
 # 主函数
 def main():
@@ -53,25 +53,23 @@ def main():
     out_file_list = [f"./data/output_{i}.txt" for i in range(len(file_list))]
     num_workers = 5
 
-    print("ThreadPoolExecutor (READ):")
-    thread_read_time, thread_read_throughput, thread_read_cpu, thread_read_mem = performance(ThreadPoolExecutor, num_workers, "read", file_list)
-    print(f"Execution Time: {thread_read_time:.2f} s | Throughput: {thread_read_throughput:.2f} tasks/s")
-    print(f"CPU usage: {thread_read_cpu:.2f}% | Memory usage: {thread_read_mem:.2f} MB\n")
-
-    print("ProcessPoolExecutor (READ):")
-    process_read_time, process_read_throughput, process_read_cpu, process_read_mem = performance(ProcessPoolExecutor, num_workers, "read", file_list)
-    print(f"Execution Time: {process_read_time:.2f} s | Throughput: {process_read_throughput:.2f} tasks/s")
-    print(f"CPU usage: {process_read_cpu:.2f}% | Memory usage: {process_read_mem:.2f} MB\n")
-
-    print("ThreadPoolExecutor (WRITE):")
-    thread_write_time, thread_write_throughput, thread_write_cpu, thread_write_mem = performance(ThreadPoolExecutor, num_workers, "write", file_list, out_file_list)
-    print(f"Execution Time: {thread_write_time:.2f} s | Throughput: {thread_write_throughput:.2f} tasks/s")
-    print(f"CPU usage: {thread_write_cpu:.2f}% | Memory usage: {thread_write_mem:.2f} MB\n")
-
-    print("ProcessPoolExecutor (WRITE):")
-    process_write_time, process_write_throughput, process_write_cpu, process_write_mem = performance(ProcessPoolExecutor, num_workers, "write", file_list, out_file_list)
-    print(f"Execution Time: {process_write_time:.2f} s | Throughput: {process_write_throughput:.2f} tasks/s")
-    print(f"CPU usage: {process_write_cpu:.2f}% | Memory usage: {process_write_mem:.2f} MB\n")
+    # AdaptiveThreadPoolExecutor 会在 1 到 num_workers 之间自动调整线程数
+    executors = (ThreadPoolExecutor, ProcessPoolExecutor, AdaptiveThreadPoolExecutor)
+
+    # 先运行流式复制，此时主进程还没有读入任何文件内容，峰值内存才有意义
+    results = run_benchmark(streaming_workloads(file_list, out_file_list), (ThreadPoolExecutor,),
+                            pool_sizes=(num_workers,), repeats=3, warmup=1, monitor_interval=0.05)
+
+    # 零拷贝版本也要在读入文件内容之前运行，否则 fork 出的 worker 的内存统计会包含这些数据
+    with SharedFileBuffers(file_list) as buffers:
+        buffers.load()
+        results += run_benchmark(zero_copy_workloads(file_list, out_file_list, buffers), executors,
+                                pool_sizes=(num_workers,), repeats=3, warmup=1, monitor_interval=0.05)
+
+    results += run_benchmark(workloads(file_list, out_file_list), executors,
+                             pool_sizes=(num_workers,), repeats=3, warmup=1, monitor_interval=0.05)
+    print_results(results)
+    save_results(results, "results/eval_file")
 
 if __name__ == "__main__":
     main()
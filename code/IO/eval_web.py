@@ -1,7 +1,17 @@
+import argparse
 import concurrent.futures
+import os
+import sys
+import threading
 import requests
-import time
-import psutil
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from Executors.adaptive import AdaptiveThreadPoolExecutor
+from Executors.bounded import BoundedExecutor
+from Harness.benchmark import run_benchmark, single_args, print_results, save_results, write_json
+from Harness.http_stub import LATENCIES, StubServer
+from Harness.loadgen import ARRIVALS, sweep, print_sweep
+from async_web import fetch_all, fetch_all_status, summarize_timings
 
 URLS = [
     "https://www.example.com",
@@ -10,6 +20,9 @@ URLS = [
     "https://www.baidu.com"
 ] * 50  # 请求次数增加到200次
 
+# 本地替身服务器的响应大小，依次近似 example.com、python.org、github.com、baidu.com 的首页
+STUB_SIZES = (1256, 50 * 1024, 250 * 1024, 2400)
+
 # 定义一个 URL 请求的函数
 def fetch_url(url):
     try:
@@ -23,49 +36,98 @@ def fetch_url(url):
     except requests.RequestException as e:
         return f"{url}: Error - {str(e)}"
 
-# 获取性能指标：执行时间、吞吐量、CPU 使用率、内存使用量
-def performance(executor_type, num_workers, task_num):
-    start_time = time.time()
-    process = psutil.Process()  
-    initial_cpu = process.cpu_percent(interval=None)  
-    initial_memory = process.memory_info().rss  
+# 每个线程（进程池中即每个 worker 进程）保存一个 requests.Session，复用 keep-alive 连接
+_local = threading.local()
 
-    execute(executor_type, num_workers, task_num)
-    end_time = time.time()
-    final_cpu = process.cpu_percent(interval=None)  
-    final_memory = process.memory_info().rss  
-
-    runtime = end_time - start_time
-    throughput = task_num / runtime
-    cpu = final_cpu - initial_cpu
-    mem = final_memory - initial_memory
+def fetch_url_session(url):
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+    try:
+        response = session.get(url, timeout=10)
+        response.raise_for_status()
+        return f"{url}: {response.status_code}"
+    except requests.Timeout:
+        return f"{url}: Timeout error"
+    except requests.ConnectionError:
+        return f"{url}: Connection error"
+    except requests.RequestException as e:
+        return f"{url}: Error - {str(e)}"
 
-    return runtime, throughput, cpu, mem
+# 工作负载注册表：名称 -> (函数, 参数元组列表)
+def workloads(urls):
+    return {
+        "fetch_url": (fetch_url, single_args(urls)),
+        "fetch_url_session": (fetch_url_session, single_args(urls)),
+    }
 
-# 执行任务的函数
-def execute(executor, num_workers, task_num):
-    with executor(max_workers=num_workers) as executor:
-        futures = [executor.submit(fetch_url, url) for url in URLS[:task_num]]
-        results = [future.result() for future in futures]
+# asyncio 引擎在一个任务里用一个事件循环抓取全部 URL，并发数与线程池的 worker 数相同
+def async_workloads(urls, concurrency):
+    return {"fetch_async": (fetch_all_status, [(urls, concurrency)], len(urls))}
 
-# 主函数
+# 主函数：默认请求本地替身服务器（结果可复现、可离线运行），--live 时请求真实网站
 def main():
+    parser = argparse.ArgumentParser(description="Web fetch benchmark.")
+    parser.add_argument("--live", action="store_true", help="fetch the real sites in URLS")
+    parser.add_argument("--latency-kind", choices=LATENCIES, default="pareto")
+    parser.add_argument("--latency", type=float, default=0.03, help="mean server latency (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--no-keep-alive", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--open-loop", action="store_true",
+                        help="offer requests at a controlled arrival rate instead of one batch")
+    parser.add_argument("--arrival", choices=ARRIVALS, default="poisson")
+    args = parser.parse_args()
+
     task_num = 200  # 请求次数
     num_workers = 10  # 线程数或进程数
 
-    print("Using ThreadPoolExecutor...")
-    thread_time, thread_throughput, thread_cpu, thread_mem = performance(concurrent.futures.ThreadPoolExecutor, num_workers, task_num)
-    print(f"Execution Time: {thread_time:.4f} s")
-    print(f"Throughput: {thread_throughput:.4f} tasks/s")
-    print(f"CPU usage: {thread_cpu:.2f}%")
-    print(f"Memory usage: {thread_mem / (1024 ** 2):.2f} MB\n")
-
-    print("Using ProcessPoolExecutor...")
-    process_time, process_throughput, process_cpu, process_mem = performance(concurrent.futures.ProcessPoolExecutor, num_workers, task_num)
-    print(f"Execution Time: {process_time:.4f} s")
-    print(f"Throughput: {process_throughput:.4f} tasks/s")
-    print(f"CPU usage: {process_cpu:.2f}%")
-    print(f"Memory usage: {process_mem / (1024 ** 2):.2f} MB\n")
+    def benchmark(urls):
+        if args.open_loop:
+            open_loop(urls, num_workers, args.arrival)
+        else:
+            run(urls, num_workers)
+
+    if args.live:
+        benchmark(URLS[:task_num])
+        return
+    with StubServer(latency_kind=args.latency_kind, latency=args.latency, max_latency=2.0,
+                    error_rate=args.error_rate, keep_alive=not args.no_keep_alive,
+                    seed=args.seed) as server:
+        benchmark(server.urls(task_num, STUB_SIZES))
+        print(f"stub server: {server.stats()}")
+
+def run(urls, num_workers):
+    results = run_benchmark(workloads(urls),
+                            (concurrent.futures.ThreadPoolExecutor, concurrent.futures.ProcessPoolExecutor,
+                             AdaptiveThreadPoolExecutor, BoundedExecutor),
+                            pool_sizes=(num_workers,), repeats=3, warmup=1, monitor_interval=0.05)
+    results += run_benchmark(async_workloads(urls, num_workers), (concurrent.futures.ThreadPoolExecutor,),
+                             pool_sizes=(1,), repeats=3, warmup=1, monitor_interval=0.05)
+    print_results(results)
+    save_results(results, "results/eval_web")
+
+    # 单独一次 asyncio 抓取，记录每个请求的 DNS / 连接 / TTFB / 响应体耗时
+    records, pool_stats = fetch_all(urls, concurrency=num_workers)
+    summary = summarize_timings(records)
+    summary.update(pool_stats)
+    print("fetch_async phases (median / p95 ms):")
+    for phase in ("dns", "connect", "ttfb", "body", "total"):
+        print(f"  {phase:>7}: {summary[phase + '_median_ms']:.2f} / {summary[phase + '_p95_ms']:.2f}")
+    print(f"  connections opened {summary['connections_opened']}, reused {summary['connections_reused']}, "
+          f"errors {summary['errors']}")
+    write_json([{"summary": summary, "requests": records}], "results/eval_web_phases.json")
+
+# 开环负载：请求按泊松或突发到达率提交，与完成速度无关
+# 记录逗留时间 p50/p99（不少于 1000 个请求时还有 p999）、失败请求数、
+# 队列深度随时间的变化，以及每种执行器的饱和拐点
+def open_loop(urls, num_workers, arrival):
+    registry = {"fetch_url_session": workloads(urls)["fetch_url_session"]}
+    steps, knees = sweep(registry, (concurrent.futures.ThreadPoolExecutor, concurrent.futures.ProcessPoolExecutor),
+                         pool_sizes=(num_workers,), count=len(urls), arrival=arrival)
+    print_sweep(steps, knees)
+    save_results(steps, "results/eval_web_open_loop")
+    save_results(knees, "results/eval_web_knee")
 
 if __name__ == "__main__":
     main()
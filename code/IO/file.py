@@ -1,11 +1,6 @@
-import os
 import concurrent.futures
 import time
-
-def generate_large_file(filename, size_in_mb=50):
-    """generate files"""
-    with open(filename, 'wb') as f:
-        f.write(os.urandom(size_in_mb * 1024 * 1024))
+from dataset_gen import generate_dataset
 
 def read_file(filename):
     with open(filename, 'rb') as f:
@@ -23,8 +18,7 @@ if __name__ == "__main__":
     
     # record the time of start
     start_time = time.time()
-    for fname in file_list:
-        generate_large_file(fname, size_in_mb=100)  # generate a 100 MB file
+    generate_dataset("./data", count=len(file_list), size_mb=100)  # 100 MB files, in parallel
     end_time = time.time()
     print(f"File generation time: {end_time - start_time:.2f} seconds")
     
@@ -0,0 +1,185 @@
+import os
+import queue
+import threading
+
+# 流式分块文件复制：内存占用只取决于块大小和队列深度，与文件数量和大小无关
+#
+# eval_file.py 的读阶段用 list(executor.map(read_file, ...)) 把所有文件整个读进内存，
+# 然后才开始写，峰值内存随数据集大小增长。这里提供三种方式：
+# - copy_file_kernel():    在内核中复制（copy_file_range / sendfile），数据不进入用户态
+# - copy_file_streaming(): 单个任务内用 readinto 读入复用的缓冲区再写出
+# - pipeline_copy():       读线程和写线程通过有界队列传递固定大小的块；缓冲区来自固定的
+#                          缓冲池，池空时读线程阻塞（背压），所以内存 = 块大小 x 队列深度
+
+CHUNK_SIZE = 1024 * 1024  # 默认块大小 1 MB
+
+
+# 在内核中复制整个文件；不支持时退回 copy_file_streaming
+def copy_file_kernel(src, dst, chunk_size=CHUNK_SIZE):
+    size = os.path.getsize(src)
+    with open(src, 'rb') as fin, open(dst, 'wb') as fout:
+        done = 0
+        try:
+            if hasattr(os, "copy_file_range"):
+                while done < size:
+                    n = os.copy_file_range(fin.fileno(), fout.fileno(), size - done)
+                    if n == 0:
+                        break
+                    done += n
+                return done
+            if hasattr(os, "sendfile"):
+                while done < size:
+                    n = os.sendfile(fout.fileno(), fin.fileno(), done, size - done)
+                    if n == 0:
+                        break
+                    done += n
+                return done
+        except OSError:
+            # 例如跨文件系统、或 macOS 上 sendfile 只支持 socket
+            if done:
+                raise
+    return copy_file_streaming(src, dst, chunk_size)
+
+
+# 用一个复用的缓冲区分块复制文件
+def copy_file_streaming(src, dst, chunk_size=CHUNK_SIZE):
+    buf = bytearray(chunk_size)
+    view = memoryview(buf)
+    done = 0
+    with open(src, 'rb', buffering=0) as fin, open(dst, 'wb', buffering=0) as fout:
+        while True:
+            n = fin.readinto(buf)
+            if not n:
+                break
+            written = 0
+            while written < n:
+                written += fout.write(view[written:n])
+            done += n
+    return done
+
+
+# 在指定偏移写入；Windows 没有 os.pwrite，用文件锁 + lseek 代替
+def _pwrite(job, data, offset):
+    if hasattr(os, "pwrite"):
+        return os.pwrite(job.fd, data, offset)
+    with job.lock:
+        os.lseek(job.fd, offset, os.SEEK_SET)
+        return os.write(job.fd, data)
+
+
+# 一个输出文件的状态：所有块写完且读线程读完后关闭文件
+class _FileJob:
+
+    def __init__(self, dst):
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+        self.fd = os.open(dst, flags, 0o644)
+        self.pending = 0
+        self.read_done = False
+        self.lock = threading.Lock()
+
+    def add_chunk(self):
+        with self.lock:
+            self.pending += 1
+
+    def finish_reading(self):
+        with self.lock:
+            self.read_done = True
+            self._maybe_close()
+
+    def chunk_written(self):
+        with self.lock:
+            self.pending -= 1
+            self._maybe_close()
+
+    def _maybe_close(self):
+        if self.read_done and self.pending == 0 and self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+# 读线程 -> 有界队列 -> 写线程 的流式复制流水线
+# 返回复制的总字节数；内存上限为 chunk_size * queue_depth
+def pipeline_copy(file_list, out_file_list, readers=2, writers=2, chunk_size=CHUNK_SIZE,
+                  queue_depth=8):
+    jobs = queue.Queue()
+    for pair in zip(file_list, out_file_list):
+        jobs.put(pair)
+    free = queue.Queue()
+    for _ in range(queue_depth):
+        free.put(bytearray(chunk_size))
+    chunks = queue.Queue(maxsize=queue_depth)
+    errors = []
+    copied = [0]
+    lock = threading.Lock()
+
+    # 关闭文件时的异常同样记录下来，而不是让线程退出
+    def _settle(step):
+        try:
+            step()
+        except BaseException as e:
+            errors.append(e)
+
+    # 出错时记录异常，并保证缓冲区归还、文件关闭，其余线程不会在队列上永久阻塞
+    def reader():
+        while not errors:
+            try:
+                src, dst = jobs.get_nowait()
+            except queue.Empty:
+                return
+            job = None
+            try:
+                job = _FileJob(dst)
+                with open(src, 'rb', buffering=0) as fin:
+                    offset = 0
+                    while not errors:
+                        buf = free.get()                   # 没有空闲缓冲区时阻塞（背压）
+                        queued = False
+                        try:
+                            n = fin.readinto(buf)
+                            if not n:
+                                break
+                            job.add_chunk()
+                            chunks.put((job, offset, buf, n))
+                            queued = True
+                        finally:
+                            if not queued:
+                                free.put(buf)
+                        offset += n
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                if job is not None:
+                    _settle(job.finish_reading)
+
+    def writer():
+        while True:
+            item = chunks.get()
+            if item is None:
+                return
+            job, offset, buf, n = item
+            try:
+                with memoryview(buf) as view:
+                    written = 0
+                    while written < n:
+                        written += _pwrite(job, view[written:n], offset + written)
+                with lock:
+                    copied[0] += n
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                free.put(buf)
+                _settle(job.chunk_written)
+
+    reader_threads = [threading.Thread(target=reader) for _ in range(readers)]
+    writer_threads = [threading.Thread(target=writer) for _ in range(writers)]
+    for t in reader_threads + writer_threads:
+        t.start()
+    for t in reader_threads:
+        t.join()
+    for _ in writer_threads:
+        chunks.put(None)
+    for t in writer_threads:
+        t.join()
+    if errors:
+        raise errors[0]
+    return copied[0]
@@ -1,109 +1,113 @@
+import argparse
 import concurrent.futures
+import multiprocessing
+import os
+import sys
 import torch
-import torchvision.transforms as transforms
 from PIL import Image
-from torchvision import models
 import time
-import psutil
-from image_gen import pick_random_image_path, generate_white_noise_image
+from image_gen import benchmark_image_paths
+import model_cache
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from Harness.instrument import InstrumentedExecutor, print_breakdown, write_timeline_csv, write_timeline_trace
+from Harness.monitor import ResourceMonitor
 
 # function for image classification (via torchvision ResNet18 model)
+# the model and transform are built once per worker (see model_cache.py), so the
+# per-image time is inference only
 def classify_image(image_path):
-    model = models.resnet18(weights=models.ResNet18_Weights.IMAGENET1K_V1)
-    model.eval()
-    
-    transform = transforms.Compose([
-        transforms.Resize((224, 224)),
-        transforms.ToTensor()
-    ])
+    model = model_cache.get_model()
+    transform = model_cache.get_transform()
     
-    image = Image.open(image_path)
+    image = Image.open(image_path).convert("RGB")
     image = transform(image).unsqueeze(0)
     with torch.no_grad():
         output = model(image)
     return output.argmax().item()
 
-# function for measuring CPU and memory usage
-def get_resource_usage():
-    process = psutil.Process()
-    cpu_percent = psutil.cpu_percent(interval=0.1)
-    memory_info = process.memory_info().rss / (1024 * 1024)
-    return cpu_percent, memory_info
-    
-# function to classify images using ThreadPoolExecutor
-def process_with_threadpool(files):
-    start_time = time.time()                      # start timer
-    cpu_start, mem_start = get_resource_usage()   # CPU and memory usage at the start
+# function for printing the per-task breakdown and exporting a Gantt-style timeline
+def report_tasks(name, rows):
+    print(f"\n{name} per-task breakdown:")
+    print_breakdown(rows, bins=5)
+    write_timeline_csv(rows, f"results/ml_{name}_timeline.csv")
+    write_timeline_trace(rows, f"results/ml_{name}_trace.json")
+
+# function to run the classification on a pool and collect the metrics
+# setup is the time spent building the model in the parent (shared / fork / shm modes)
+def run_pool(name, make_pool, files, setup):
+    monitor = ResourceMonitor(interval=0.05).start()   # samples parent + worker processes
+    start_time = time.perf_counter()                   # start timer
     
-    # classify images with ThreadPool
-    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+    with make_pool() as pool:
+        executor = InstrumentedExecutor(pool)
         results = list(executor.map(classify_image, files))
     
-    end_time = time.time()                        # end timer
-    cpu_end, mem_end = get_resource_usage()       # CPU and memory usage at the end
+    end_time = time.perf_counter()                     # end timer
+    usage = monitor.stop().summary()
     
-    # calculate metrics based on difference
+    # calculate metrics: mean CPU and peak RSS over the whole process tree
     total_time = end_time - start_time
-    throughput = len(files) / total_time
-    cpu_usage = cpu_end - cpu_start
-    mem_usage = mem_end - mem_start
+    metrics = {
+        "results": results,
+        "setup": setup,
+        "time": total_time,
+        "throughput": len(files) / total_time,
+        "cpu": usage["cpu_percent_mean"],
+        "mem": usage["rss_peak_mb"],
+        "pss": usage["pss_peak_mb"],
+    }
 
-    return results, total_time, throughput, cpu_usage, mem_usage
-
-# function to classify images using ProcessPoolExecutor
-def process_with_processpool(files):
-    start_time = time.time()                      # start timer
-    cpu_start, mem_start = get_resource_usage()   # CPU and memory usage at the start
-    
-    # classify images with ProcessPool
-    with concurrent.futures.ProcessPoolExecutor(max_workers=4) as executor:
-        results = list(executor.map(classify_image, files))
+    # per-task queueing delay / service time / transfer time
+    report_tasks(name, executor.breakdown())
+    return metrics
     
-    end_time = time.time()                        # end timer
-    cpu_end, mem_end = get_resource_usage()       # CPU and memory usage at the end
-    
-    # calculate metrics based on difference
-    total_time = end_time - start_time
-    throughput = len(files) / total_time
-    cpu_usage = cpu_end - cpu_start
-    mem_usage = mem_end - mem_start
+# function to classify images using ThreadPoolExecutor
+# sharing: "shared" (one model for all threads) or "thread-local" (one model per thread)
+def process_with_threadpool(files, sharing="shared"):
+    before = model_cache.load_seconds
+    model_cache.thread_pool_setup(sharing)
+    setup = model_cache.load_seconds - before
+    return run_pool(f"ThreadPoolExecutor_{sharing}",
+                    lambda: concurrent.futures.ThreadPoolExecutor(max_workers=4), files, setup)
 
-    return results, total_time, throughput, cpu_usage, mem_usage   
+# function to classify images using ProcessPoolExecutor
+# sharing: "load" (each worker loads the model in its initializer), "fork" (workers
+# inherit the parent's model copy-on-write) or "shm" (weights in shared memory)
+def process_with_processpool(files, sharing="load", num_threads=None):
+    before = model_cache.load_seconds
+    pool_args = model_cache.process_pool_args(sharing, num_threads)
+    setup = model_cache.load_seconds - before
+    return run_pool(f"ProcessPoolExecutor_{sharing}",
+                    lambda: concurrent.futures.ProcessPoolExecutor(max_workers=4, **pool_args), files, setup)
 
 if __name__ == "__main__":        # idiom to prevent program freeze for processes
     
-    # randomly picking high res image
-    high_res_image_path = pick_random_image_path("high-res-images")
-    print(f"\nChoosing high res image {high_res_image_path[-5]}.")
-
-    # randomly picking low res image
-    low_res_image_path = pick_random_image_path("low-res-images")
-    print(f"Choosing low res image {low_res_image_path[-5]}.")
-
-    # generating white noise image
-    white_noise_image_path = generate_white_noise_image()
-    if white_noise_image_path:
-        print("Successfully generated white noise image.")
+    # --corpus DIR runs on a generated corpus (image_corpus.py) instead of the three sample images
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default=None)
+    parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args()
 
     # defining image paths
-    image_paths = [high_res_image_path, low_res_image_path, white_noise_image_path]
+    image_paths = benchmark_image_paths(args.corpus, args.limit)
     
-    # call function for ThreadPoolExecutor
-    thread_results, thread_time, thread_throughput, thread_cpu, thread_mem = process_with_threadpool(image_paths)
-    
-    # call function for ProcessPoolExecutor
-    process_results, process_time, process_throughput, process_cpu, process_mem = process_with_processpool(image_paths)
-
-    # display ThreadPoolExecutor metrics for user
-    print(f"\nThreadPoolExecutor results: {thread_results}")
-    print(f"ThreadPoolExecutor time: {thread_time:.4f} seconds")
-    print(f"ThreadPoolExecutor throughput: {thread_throughput:.4f} images/sec")
-    print(f"ThreadPoolExecutor CPU usage: {thread_cpu:.2f}%")
-    print(f"ThreadPoolExecutor memory usage: {thread_mem:.2f} MB")
+    # split the cores between the 4 workers so torch's intra-op threads do not oversubscribe
+    num_threads = max(1, (os.cpu_count() or 4) // 4)
+    runs = {}
+    for sharing in model_cache.THREAD_SHARING:
+        runs[f"ThreadPoolExecutor ({sharing})"] = process_with_threadpool(image_paths, sharing)
+    process_modes = ["load", "shm"]
+    if "fork" in multiprocessing.get_all_start_methods():
+        process_modes.insert(1, "fork")
+    for sharing in process_modes:
+        runs[f"ProcessPoolExecutor ({sharing})"] = process_with_processpool(image_paths, sharing, num_threads)
 
-    # display ProcessPoolExecutor metrics for user
-    print(f"\nProcessPoolExecutor results: {process_results}")
-    print(f"ProcessPoolExecutor time: {process_time:.4f} seconds")
-    print(f"ProcessPoolExecutor throughput: {process_throughput:.4f} images/sec")
-    print(f"ProcessPoolExecutor CPU usage: {process_cpu:.2f}%")
-    print(f"ProcessPoolExecutor memory usage: {process_mem:.2f} MB")
\ No newline at end of file
+    # display metrics for user
+    for name, m in runs.items():
+        print(f"\n{name} results: {m['results']}")
+        print(f"{name} model setup in parent: {m['setup']:.4f} seconds")
+        print(f"{name} time: {m['time']:.4f} seconds")
+        print(f"{name} throughput: {m['throughput']:.4f} images/sec")
+        print(f"{name} CPU usage: {m['cpu']:.2f}%")
+        print(f"{name} peak memory usage: {m['mem']:.2f} MB (PSS {m['pss']:.2f} MB)")
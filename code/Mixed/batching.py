@@ -0,0 +1,201 @@
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+import torch
+from PIL import Image
+
+import model_cache
+from image_gen import pick_random_image_path, generate_white_noise_image
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from Harness.benchmark import save_results
+from Harness.stats import percentile
+
+# Dynamic micro-batching in front of the ResNet18 classifier
+#
+# classify_image() runs one unsqueeze(0) image per forward pass. BatchingClassifier
+# queues incoming requests; each of its worker threads takes the first waiting request,
+# then keeps collecting until it has max_batch_size requests or max_wait seconds have
+# passed, stacks them into one tensor, runs a single forward pass and sets the result
+# of every request's future. max_wait trades latency at low load for larger batches.
+# While the classifier is open, torch uses num_threads intra-op threads for every
+# worker's forward passes (keep workers x num_threads <= cores). The setting is
+# process-wide, so it is restored on shutdown and later classifiers start from the
+# default again.
+
+
+# function for decoding and preprocessing one image into a 3x224x224 tensor
+def load_tensor(image_path):
+    return model_cache.get_transform()(Image.open(image_path).convert("RGB"))
+
+
+class BatchingClassifier:
+
+    def __init__(self, model=None, max_batch_size=8, max_wait=0.005, workers=1, num_threads=None):
+        self.model = model if model is not None else model_cache.get_model()
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.num_threads = num_threads
+        self.batch_sizes = []
+        self.busy_seconds = 0.0     # total time spent in forward passes, over all workers
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._saved_threads = None
+        if num_threads:
+            self._saved_threads = torch.get_num_threads()
+            torch.set_num_threads(num_threads)
+        self._threads = [threading.Thread(target=self._worker, name=f"BatchWorker-{i}", daemon=True)
+                         for i in range(workers)]
+        for t in self._threads:
+            t.start()
+
+    # queue one preprocessed image tensor; the future's result is the class index
+    def submit(self, tensor):
+        future = Future()
+        self._queue.put((tensor, future))
+        return future
+
+    def submit_image(self, image_path):
+        return self.submit(load_tensor(image_path))
+
+    def shutdown(self):
+        self._queue.put(None)
+        for t in self._threads:
+            t.join()
+        if self._saved_threads is not None:
+            torch.set_num_threads(self._saved_threads)
+            self._saved_threads = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+
+    # block for the first request, then collect more until the batch is full or max_wait passed
+    def _next_batch(self):
+        item = self._queue.get()
+        if item is None:
+            self._queue.put(None)        # let the other workers see the shutdown too
+            return None
+        batch = [item]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _worker(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            batch = [(tensor, future) for tensor, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            start = time.perf_counter()
+            try:
+                with torch.no_grad():
+                    labels = self.model(torch.stack([tensor for tensor, _ in batch])).argmax(dim=1).tolist()
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            finally:
+                with self._lock:
+                    self.batch_sizes.append(len(batch))
+                    self.busy_seconds += time.perf_counter() - start
+            for (_, future), label in zip(batch, labels):
+                future.set_result(label)
+
+
+# send num_requests requests through one classifier and measure latency and throughput
+# rate=None submits everything at once (saturated); otherwise requests arrive every 1/rate s
+def measure(tensors, num_requests=64, rate=None, **classifier_args):
+    latencies = [0.0] * num_requests
+
+    def done(i, submitted):
+        def callback(future):
+            latencies[i] = time.perf_counter() - submitted
+        return callback
+
+    with BatchingClassifier(**classifier_args) as classifier:
+        start = time.perf_counter()
+        futures = []
+        for i in range(num_requests):
+            if rate:
+                delay = start + i / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            submitted = time.perf_counter()
+            future = classifier.submit(tensors[i % len(tensors)])
+            future.add_done_callback(done(i, submitted))
+            futures.append(future)
+        for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - start
+        sizes = classifier.batch_sizes
+    latencies_ms = [s * 1000 for s in latencies]
+    return {
+        "max_batch_size": classifier_args.get("max_batch_size", 8),
+        "max_wait_ms": classifier_args.get("max_wait", 0.005) * 1000,
+        "workers": classifier_args.get("workers", 1),
+        "num_threads": classifier_args.get("num_threads") or torch.get_num_threads(),
+        "rate": rate or "burst",
+        "requests": num_requests,
+        "batches": len(sizes),
+        "mean_batch": sum(sizes) / len(sizes),
+        "runtime_s": elapsed,
+        "throughput": num_requests / elapsed,
+        "latency_median_ms": percentile(latencies_ms, 50),
+        "latency_p95_ms": percentile(latencies_ms, 95),
+        "latency_p99_ms": percentile(latencies_ms, 99),
+    }
+
+
+# latency/throughput tradeoff curve: one row per (max_batch_size, max_wait, rate)
+def sweep(tensors, batch_sizes=(1, 2, 4, 8, 16, 32), max_waits=(0.0, 0.005, 0.02), rates=(None,),
+          num_requests=64, workers=1, num_threads=None):
+    rows = []
+    for rate in rates:
+        for max_wait in max_waits:
+            for max_batch_size in batch_sizes:
+                rows.append(measure(tensors, num_requests, rate, max_batch_size=max_batch_size,
+                                    max_wait=max_wait, workers=workers, num_threads=num_threads))
+    return rows
+
+
+def print_sweep(rows):
+    print(f"{'rate':>6} {'wait ms':>7} {'batch':>5} {'mean':>5} {'throughput':>11} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for r in rows:
+        print(f"{r['rate']:>6} {r['max_wait_ms']:>7.1f} {r['max_batch_size']:>5} {r['mean_batch']:>5.1f} "
+              f"{r['throughput']:>7.2f} i/s {r['latency_median_ms']:>8.1f} {r['latency_p95_ms']:>8.1f} "
+              f"{r['latency_p99_ms']:>8.1f}")
+
+
+if __name__ == "__main__":
+    image_paths = [pick_random_image_path("high-res-images"), pick_random_image_path("low-res-images"),
+                   generate_white_noise_image()]
+    tensors = [load_tensor(path) for path in image_paths]
+    model_cache.get_model()        # build the model before timing anything
+
+    # saturated load shows the throughput gain of batching; a paced arrival rate shows
+    # what max_wait costs in latency when requests trickle in
+    rows = sweep(tensors, rates=(None, 20))
+    # two batch workers splitting the cores: one batch can be collected while the other runs
+    rows += sweep(tensors, batch_sizes=(1, 8, 32), max_waits=(0.005,),
+                  workers=2, num_threads=max(1, (os.cpu_count() or 2) // 2))
+    print_sweep(rows)
+    save_results(rows, "results/ml_batching")
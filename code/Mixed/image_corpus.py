@@ -0,0 +1,133 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+# Synthetic image corpus for the Mixed benchmarks
+#
+# The image and ML benchmarks only use three images, and generate_white_noise_image()
+# always writes the same white_noise.jpg. generate_corpus() writes N images in parallel
+# (process pool). Every image is drawn from its own seeded generator
+# (np.random.default_rng([seed, index])), so the same seed always gives the same
+# corpus. Each draw picks:
+# - a resolution from `resolutions`, weighted by `resolution_weights`
+# - a format from `formats` (jpeg / png / webp), weighted by `format_weights`
+# - a JPEG/WebP quality uniformly in `quality_range`
+# - the content: "noise" (incompressible), "gradient" (smooth, compresses well) or,
+#   with kind="mixed", either of the two
+# Files are named img_<index>.<ext>, so paths never collide, and manifest.json lists
+# every image with its parameters and size on disk. load_corpus() reads it back.
+
+RESOLUTIONS = ((256, 256), (1024, 1024), (1792, 1024))
+FORMATS = ("jpeg", "png", "webp")
+EXTENSIONS = {"jpeg": "jpg", "png": "png", "webp": "webp"}
+KINDS = ("noise", "gradient", "mixed")
+
+
+# function for drawing the pixels of one image
+def _pixels(rng, width, height, kind):
+    if kind == "noise":
+        return rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    # gradient: a random linear colour ramp plus a little noise
+    y = np.linspace(0, 1, height, dtype=np.float32)[:, None, None]
+    x = np.linspace(0, 1, width, dtype=np.float32)[None, :, None]
+    top_left, right, bottom = rng.uniform(0, 255, (3, 3)).astype(np.float32)
+    image = top_left + (right - top_left) * x + (bottom - top_left) * y + rng.normal(0, 4, (height, width, 3))
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+
+# function for generating one image; returns its manifest entry
+def generate_image(directory, index, seed=0, resolutions=RESOLUTIONS, resolution_weights=None,
+                   formats=("jpeg",), format_weights=None, quality_range=(75, 95), kind="mixed"):
+    if kind not in KINDS:
+        raise ValueError(f"Unknown kind {kind!r}. Use one of: {', '.join(KINDS)}.")
+    rng = np.random.default_rng([seed, index])
+    width, height = resolutions[rng.choice(len(resolutions), p=_normalize(resolution_weights, resolutions))]
+    fmt = formats[rng.choice(len(formats), p=_normalize(format_weights, formats))]
+    quality = int(rng.integers(quality_range[0], quality_range[1] + 1))
+    content = kind if kind != "mixed" else ("noise", "gradient")[rng.integers(2)]
+    path = os.path.join(directory, f"img_{index:06d}.{EXTENSIONS[fmt]}")
+    image = Image.fromarray(_pixels(rng, width, height, content))
+    if fmt == "png":
+        image.save(path, format="PNG")
+    else:
+        image.save(path, format=fmt.upper(), quality=quality)
+    return {"path": path, "index": index, "width": width, "height": height, "format": fmt,
+            "quality": quality if fmt != "png" else None, "content": content,
+            "bytes": os.path.getsize(path)}
+
+
+def _normalize(weights, choices):
+    if weights is None:
+        return None
+    if len(weights) != len(choices):
+        raise ValueError("need one weight per choice")
+    total = float(sum(weights))
+    return [w / total for w in weights]
+
+
+# function for generating `count` images in parallel and writing manifest.json
+def generate_corpus(directory, count=100, seed=0, resolutions=RESOLUTIONS, resolution_weights=None,
+                    formats=("jpeg",), format_weights=None, quality_range=(75, 95), kind="mixed",
+                    max_workers=None):
+    os.makedirs(directory, exist_ok=True)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(generate_image, directory, i, seed, resolutions, resolution_weights,
+                                   formats, format_weights, quality_range, kind)
+                   for i in range(count)]
+        images = [future.result() for future in futures]
+    manifest = {
+        "seed": seed, "count": count, "kind": kind,
+        "resolutions": [list(r) for r in resolutions], "resolution_weights": resolution_weights,
+        "formats": list(formats), "format_weights": format_weights,
+        "quality_range": list(quality_range),
+        "seconds": time.perf_counter() - start,
+        "images": images,
+    }
+    with open(os.path.join(directory, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+# function for reading the image paths of a corpus (optionally only the first `limit`)
+# paths are resolved against `directory`, so a corpus can be moved or read from another cwd
+def load_corpus(directory, limit=None):
+    with open(os.path.join(directory, "manifest.json")) as f:
+        images = json.load(f)["images"]
+    return [os.path.join(directory, os.path.basename(image["path"])) for image in images[:limit]]
+
+
+def _resolution(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic image corpus.")
+    parser.add_argument("--out", default="corpus")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--resolutions", type=_resolution, nargs="+", default=list(RESOLUTIONS),
+                        help="e.g. 256x256 1792x1024")
+    parser.add_argument("--resolution-weights", type=float, nargs="+", default=None)
+    parser.add_argument("--formats", choices=FORMATS, nargs="+", default=["jpeg"])
+    parser.add_argument("--format-weights", type=float, nargs="+", default=None)
+    parser.add_argument("--quality", type=int, nargs=2, default=[75, 95], metavar=("MIN", "MAX"))
+    parser.add_argument("--kind", choices=KINDS, default="mixed")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    manifest = generate_corpus(args.out, args.count, args.seed, args.resolutions, args.resolution_weights,
+                               args.formats, args.format_weights, args.quality, args.kind, args.workers)
+    total_mb = sum(image["bytes"] for image in manifest["images"]) / (1024 * 1024)
+    print(f"{args.out}: {args.count} images, {total_mb:.1f} MB in {manifest['seconds']:.2f} s "
+          f"({args.count / manifest['seconds']:.1f} images/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ import os
 import random
 import numpy as np
 from PIL import Image
+from image_corpus import load_corpus
 
 ''' 
 Function for choosing random image from folder path.
@@ -15,15 +16,33 @@ def pick_random_image_path(folder_path):
 
 '''
 Function for generating random 256x256 white noise image with error handling.
-Saves generated image into directory.
+Saves generated image into directory (white_noise.jpg unless another path is given).
 '''
-def generate_white_noise_image():
+def generate_white_noise_image(path="white_noise.jpg"):
     try: 
         noise = np.random.randint(0, 256, (256, 256, 3), dtype = np.uint8)
         image = Image.fromarray(noise)
-        path = "white_noise.jpg"
         image.save(path)
         return path
     except Exception as e:
         print(f"Error in generating image: {e}")
         return None
+
+'''
+Function for choosing the benchmark inputs.
+Without a corpus: one random high res image, one random low res image and a white noise
+image, as before. With a corpus directory (see image_corpus.py): the first `limit`
+images listed in its manifest.
+'''
+def benchmark_image_paths(corpus=None, limit=None):
+    if corpus:
+        return load_corpus(corpus, limit)
+    
+    high_res_image_path = pick_random_image_path("high-res-images")
+    print(f"\nChoosing high res image {high_res_image_path[-5]}.")
+    low_res_image_path = pick_random_image_path("low-res-images")
+    print(f"Choosing low res image {low_res_image_path[-5]}.")
+    white_noise_image_path = generate_white_noise_image()
+    if white_noise_image_path:
+        print("Successfully generated white noise image.")
+    return [high_res_image_path, low_res_image_path, white_noise_image_path]
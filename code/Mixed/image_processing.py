@@ -1,86 +1,49 @@
 # import necessary libraries
+import argparse
 import concurrent.futures
+import os
+import sys
 from PIL import Image
-import time
-import psutil
-from image_gen import pick_random_image_path, generate_white_noise_image
+from image_gen import benchmark_image_paths
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from Executors.warm_pool import WarmPoolManager
+from Harness.benchmark import run_benchmark, single_args, print_results, save_results
+
+# resized images go here, not next to the inputs, so later runs never pick them up as inputs
+OUTPUT_DIR = os.path.join("results", "resized")
 
 # function for image processing (loading, resizing, and saving)
 def process_image(image_path):
     image = Image.open(image_path)
     image = image.resize((100, 100))
-    image.save("resized_" + image_path)
-    
-# function for measuring CPU and memory usage
-def get_resource_usage():
-    process = psutil.Process()
-    cpu_percent = psutil.cpu_percent(interval=0.1)
-    memory_info = process.memory_info().rss / (1024 * 1024)
-    return cpu_percent, memory_info
+    folder, name = os.path.split(image_path)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    image.save(os.path.join(OUTPUT_DIR, os.path.basename(folder) + "_" + name))
 
 if __name__ == "__main__":        # idiom to prevent program freeze for processes
     
-    # randomly picking high res image
-    high_res_image_path = pick_random_image_path("high-res-images")
-    print(f"\nChoosing high res image {high_res_image_path[-5]}.")
-
-    # randomly picking low res image
-    low_res_image_path = pick_random_image_path("low-res-images")
-    print(f"Choosing low res image {low_res_image_path[-5]}.")
-
-    # generating white noise image
-    white_noise_image_path = generate_white_noise_image()
-    if white_noise_image_path:
-        print("Successfully generated white noise image.")
+    # --corpus DIR runs on a generated corpus (image_corpus.py) instead of the three sample images
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default=None)
+    parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args()
 
     # defining image paths
-    image_paths = [high_res_image_path, low_res_image_path, white_noise_image_path]
-
-    
-    # ThreadPoolExecutor
-    start_time = time.time()                      # start timer
-    cpu_start, mem_start = get_resource_usage()   # CPU and memory usage at the start
-
-    # process images with ThreadPool
-    with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-        executor.map(process_image, image_paths)
-
-    end_time = time.time()                        # end timer
-    cpu_end, mem_end = get_resource_usage()       # CPU and memory usage at the end
-
-    # calculate metrics based on difference
-    thread_time = time.time() - start_time
-    thread_throughput = len(image_paths) / thread_time
-    thread_cpu = cpu_end - cpu_start
-    thread_mem = mem_end - mem_start
-
-
-    # ProcessPoolExecutor
-    start_time = time.time()                      # start timer
-    cpu_start, mem_start = get_resource_usage()   # CPU and memory usage at the start
-
-    # process image with ProcessPool
-    with concurrent.futures.ProcessPoolExecutor(max_workers=5) as executor:
-        executor.map(process_image, image_paths)
-
-    end_time = time.time()                        # end timer
-    cpu_end, mem_end = get_resource_usage()       # CPU and memory usage at the end
-
-    # calculate metrics based on difference
-    process_time = time.time() - start_time
-    process_throughput = len(image_paths) / process_time
-    process_cpu = cpu_end - cpu_start
-    process_mem = mem_end - mem_start
-    
-    
-    # display ThreadPoolExecutor metrics for user
-    print(f"\nThreadPoolExecutor time: {thread_time:.4f} seconds")
-    print(f"ThreadPoolExecutor throughput: {thread_throughput:.4f} images/sec")
-    print(f"ThreadPoolExecutor CPU usage: {thread_cpu:.2f}%")
-    print(f"ThreadPoolExecutor memory usage: {thread_mem:.2f} MB")
-
-    # display ProcessPoolExecutor metrics for user
-    print(f"\nProcessPoolExecutor time: {process_time:.4f} seconds")
-    print(f"ProcessPoolExecutor throughput: {process_throughput:.4f} images/sec")
-    print(f"ProcessPoolExecutor CPU usage: {process_cpu:.2f}%")
-    print(f"ProcessPoolExecutor memory usage: {process_mem:.2f} MB")
\ No newline at end of file
+    image_paths = benchmark_image_paths(args.corpus, args.limit)
+
+    # workload registry: name -> (function, list of argument tuples)
+    workloads = {"process_image": (process_image, single_args(image_paths))}
+
+    # time ThreadPoolExecutor and ProcessPoolExecutor with warm-up and repetitions, on warm
+    # pools whose workers have already imported PIL (start-up is reported separately)
+    with WarmPoolManager(("PIL.Image",)) as manager:
+        results = run_benchmark(workloads,
+                                (concurrent.futures.ThreadPoolExecutor, concurrent.futures.ProcessPoolExecutor),
+                                pool_sizes=(5,), repeats=5, warmup=1, monitor_interval=0.05,
+                                pool_manager=manager)
+
+    # display metrics for user
+    print()
+    print_results(results)
+    save_results(results, "results/image_processing")
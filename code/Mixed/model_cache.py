@@ -0,0 +1,122 @@
+import multiprocessing
+import threading
+import time
+
+import torch
+import torch.multiprocessing  # registers the reductions that pass shared-memory tensors by handle
+import torchvision.transforms as transforms
+from torchvision import models
+
+# Per-worker cache for the ResNet18 model used by ML_image_processing.py
+#
+# classify_image() used to build the model, load the weights and build the transform
+# on every call, so every image paid for model loading. Here the model is built once
+# per worker and kept in a module global:
+#
+# process pools (pass initializer/initargs from process_pool_args()):
+#   "load"  - every worker builds its own copy in the initializer
+#   "fork"  - the parent builds the model before the pool forks; workers inherit it and
+#             share the weight pages copy-on-write (POSIX only)
+#   "shm"   - the parent moves the weights into shared memory (model.share_memory())
+#             and passes the model to the initializer; torch.multiprocessing sends the
+#             tensors as shared-memory handles, so all workers map one copy
+# thread pools (thread_pool_setup()):
+#   "shared"       - one model for all threads (eval mode + no_grad is read-only)
+#   "thread-local" - one model per thread, built on the thread's first image
+
+PROCESS_SHARING = ("load", "fork", "shm")
+THREAD_SHARING = ("shared", "thread-local")
+
+_model = None
+_transform = None
+_local = threading.local()
+_thread_local = False
+load_seconds = 0.0      # time this process spent building models
+
+
+def build_model():
+    model = models.resnet18(weights=models.ResNet18_Weights.IMAGENET1K_V1)
+    model.eval()
+    return model
+
+
+def build_transform():
+    return transforms.Compose([
+        transforms.Resize((224, 224)),
+        transforms.ToTensor()
+    ])
+
+
+def _timed_build():
+    global load_seconds
+    start = time.perf_counter()
+    model = build_model()
+    load_seconds += time.perf_counter() - start
+    return model
+
+
+# process pool initializer: keep the given model (shm) or build a fresh one (load)
+# a process worker always uses its one model, even if the parent last ran "thread-local"
+def init_worker(model=None, num_threads=None):
+    global _model, _transform, _thread_local
+    _thread_local = False
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    _model = model if model is not None else _timed_build()
+    _transform = build_transform()
+
+
+# initializer for forked workers: keep the model inherited from the parent
+def _init_inherited(num_threads=None):
+    init_worker(_model, num_threads)
+
+
+# the model for the calling worker / thread
+def get_model():
+    if _thread_local:
+        model = getattr(_local, "model", None)
+        if model is None:
+            model = _local.model = _timed_build()
+        return model
+    if _model is None:
+        init_worker()
+    return _model
+
+
+def get_transform():
+    global _transform
+    if _transform is None:
+        _transform = build_transform()
+    return _transform
+
+
+# keyword arguments for ProcessPoolExecutor(...) implementing the given sharing mode
+# num_threads limits torch's intra-op threads per worker (workers x threads <= cores)
+def process_pool_args(sharing="load", num_threads=None):
+    global _model, _thread_local
+    if sharing not in PROCESS_SHARING:
+        raise ValueError(f"Unknown sharing {sharing!r}. Use one of: {', '.join(PROCESS_SHARING)}.")
+    _thread_local = False       # forked workers inherit this flag
+    if sharing == "load":
+        return {"initializer": init_worker, "initargs": (None, num_threads)}
+    if sharing == "fork":
+        if "fork" not in multiprocessing.get_all_start_methods():
+            raise ValueError("sharing='fork' needs the fork start method (POSIX)")
+        if _model is None:
+            _model = _timed_build()             # inherited by the forked workers
+        return {"initializer": _init_inherited, "initargs": (num_threads,),
+                "mp_context": multiprocessing.get_context("fork")}
+    if _model is None:
+        _model = _timed_build()
+    _model.share_memory()
+    return {"initializer": init_worker, "initargs": (_model, num_threads)}
+
+
+# prepare the module for a thread pool with the given sharing mode
+def thread_pool_setup(sharing="shared"):
+    global _thread_local
+    if sharing not in THREAD_SHARING:
+        raise ValueError(f"Unknown sharing {sharing!r}. Use one of: {', '.join(THREAD_SHARING)}.")
+    _thread_local = sharing == "thread-local"
+    if not _thread_local:
+        init_worker(_model)
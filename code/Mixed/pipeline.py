@@ -0,0 +1,215 @@
+import concurrent.futures
+import os
+import queue
+import sys
+import threading
+import time
+
+from PIL import Image
+
+import model_cache
+from batching import BatchingClassifier
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from Harness.benchmark import save_results
+
+# Staged decode -> preprocess -> infer pipeline for the ML workload
+#
+# classify_image() opens the file, resizes, converts to a tensor and runs the model
+# serially inside one worker, so disk I/O, PIL work and torch work never overlap.
+# Here every step is its own stage with its own, independently sized workers:
+#
+#   decode      thread pool      - read + decode the image file (PIL releases the GIL)
+#   preprocess  process or thread pool - resize + ToTensor
+#   infer       BatchingClassifier - a single model owner running batched forward passes
+#
+# Stages are connected by bounded queues (depth items), so a slow stage makes the
+# stages before it block instead of piling up decoded images in memory. Items keep
+# their input order. Each stage reports:
+#   utilization - busy time / (workers x wall time)
+#   starved     - time its dispatcher waited for input from the previous stage
+#   blocked     - time it waited for room in the next stage's queue
+# The stage with the highest utilization is the bottleneck.
+
+_DONE = object()
+
+
+class _Failed:
+
+    def __init__(self, error):
+        self.error = error
+
+
+# runs in the worker: the stage function's result plus the time spent computing it
+def _timed(fn, item):
+    start = time.perf_counter()
+    result = fn(item)
+    return result, time.perf_counter() - start
+
+
+# function for reading and decoding an image file
+def decode(image_path):
+    return Image.open(image_path).convert("RGB")
+
+
+# function for resizing a decoded image and converting it to a tensor
+def preprocess(image):
+    return model_cache.get_transform()(image)
+
+
+class _Stage:
+
+    def __init__(self, name, submit, workers, depth, timed=True, inflight=None):
+        self.name = name
+        self.submit = submit
+        self.workers = workers
+        self.timed = timed
+        self.inbox = queue.Queue(maxsize=depth)
+        self._inflight = queue.Queue()
+        # items submitted but not yet collected
+        self._slots = threading.Semaphore(inflight or workers + depth)
+        self.items = 0
+        self.busy = 0.0
+        self.starved = 0.0
+        self.blocked = 0.0
+
+    def start(self, outbox):
+        self._threads = [threading.Thread(target=self._dispatch, daemon=True),
+                         threading.Thread(target=self._collect, args=(outbox,), daemon=True)]
+        for t in self._threads:
+            t.start()
+
+    def join(self):
+        for t in self._threads:
+            t.join()
+
+    def _dispatch(self):
+        while True:
+            waited = time.perf_counter()
+            item = self.inbox.get()
+            self.starved += time.perf_counter() - waited
+            if item is _DONE or isinstance(item, _Failed):
+                self._inflight.put(item)
+                if item is _DONE:
+                    return
+                continue
+            self._slots.acquire()
+            try:
+                self._inflight.put(self.submit(item))
+            except Exception as e:
+                self._slots.release()
+                self._inflight.put(_Failed(e))
+
+    def _collect(self, outbox):
+        while True:
+            future = self._inflight.get()
+            if future is _DONE:
+                outbox.put(_DONE)
+                return
+            if isinstance(future, _Failed):
+                outbox.put(future)
+                continue
+            try:
+                result = future.result()
+            except Exception as e:
+                result = _Failed(e)
+            self._slots.release()
+            if self.timed and not isinstance(result, _Failed):
+                result, seconds = result
+                self.busy += seconds
+            self.items += 1
+            waited = time.perf_counter()
+            outbox.put(result)
+            self.blocked += time.perf_counter() - waited
+
+    def stats(self, wall):
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "items": self.items,
+            "busy_s": self.busy,
+            "utilization": self.busy / (self.workers * wall) if wall else 0.0,
+            "starved_s": self.starved,
+            "blocked_s": self.blocked,
+        }
+
+
+# classify image_paths through the three stages
+# returns (labels in input order, per-stage stats, wall time in seconds)
+# preprocess_mode "process" runs resize + ToTensor in a process pool, "thread" in a thread pool
+def run_pipeline(image_paths, decode_workers=4, preprocess_workers=2, preprocess_mode="process",
+                 infer_workers=1, num_threads=None, max_batch_size=8, max_wait=0.005, depth=8):
+    if preprocess_mode not in ("process", "thread"):
+        raise ValueError(f"Unknown preprocess_mode {preprocess_mode!r}. Use 'process' or 'thread'.")
+    preprocess_type = (concurrent.futures.ProcessPoolExecutor if preprocess_mode == "process"
+                       else concurrent.futures.ThreadPoolExecutor)
+    model = model_cache.get_model()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=decode_workers) as decode_pool, \
+            preprocess_type(max_workers=preprocess_workers) as preprocess_pool, \
+            BatchingClassifier(model, max_batch_size, max_wait, infer_workers, num_threads) as classifier:
+        stages = [
+            _Stage("decode", lambda path: decode_pool.submit(_timed, decode, path), decode_workers, depth),
+            _Stage("preprocess", lambda image: preprocess_pool.submit(_timed, preprocess, image),
+                   preprocess_workers, depth),
+            # enough requests in flight for every infer worker to fill a batch
+            _Stage("infer", classifier.submit, infer_workers, depth, timed=False,
+                   inflight=infer_workers * max_batch_size + depth),
+        ]
+        results = queue.Queue()
+        for stage, nxt in zip(stages, stages[1:]):
+            stage.start(nxt.inbox)
+        stages[-1].start(results)
+
+        def feed():
+            for path in image_paths:
+                stages[0].inbox.put(path)
+            stages[0].inbox.put(_DONE)
+
+        start = time.perf_counter()
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+        labels = []
+        while True:
+            item = results.get()
+            if item is _DONE:
+                break
+            labels.append(item)
+        wall = time.perf_counter() - start
+        feeder.join()
+        for stage in stages:
+            stage.join()
+        stages[-1].busy = classifier.busy_seconds
+    errors = [item.error for item in labels if isinstance(item, _Failed)]
+    if errors:
+        raise errors[0]
+    return labels, [stage.stats(wall) for stage in stages], wall
+
+
+def print_stages(rows):
+    print(f"{'stage':>10} {'workers':>7} {'items':>6} {'busy s':>8} {'util':>6} {'starved s':>10} {'blocked s':>10}")
+    for r in rows:
+        print(f"{r['stage']:>10} {r['workers']:>7} {r['items']:>6} {r['busy_s']:>8.2f} "
+              f"{r['utilization']:>6.0%} {r['starved_s']:>10.2f} {r['blocked_s']:>10.2f}")
+    bottleneck = max(rows, key=lambda r: r["utilization"])
+    print(f"bottleneck: {bottleneck['stage']}")
+
+
+if __name__ == "__main__":
+    folders = ["high-res-images", "low-res-images"]
+    image_paths = [os.path.join(folder, name) for folder in folders for name in sorted(os.listdir(folder))] * 8
+
+    # stage sizes to compare: (decode threads, preprocess workers, preprocess mode, infer workers)
+    configs = [(2, 2, "thread", 1), (4, 2, "process", 1), (4, 4, "process", 1), (4, 4, "process", 2)]
+    cores = os.cpu_count() or 4
+    rows = []
+    for decode_workers, preprocess_workers, mode, infer_workers in configs:
+        labels, stages, wall = run_pipeline(image_paths, decode_workers, preprocess_workers, mode,
+                                            infer_workers, num_threads=max(1, cores // (2 * infer_workers)))
+        print(f"\ndecode x{decode_workers} | preprocess x{preprocess_workers} ({mode}) | infer x{infer_workers}: "
+              f"{wall:.2f} s, {len(labels) / wall:.2f} images/s")
+        print_stages(stages)
+        for stage in stages:
+            rows.append({"decode_workers": decode_workers, "preprocess_workers": preprocess_workers,
+                         "preprocess_mode": mode, "infer_workers": infer_workers, "runtime_s": wall,
+                         "throughput": len(labels) / wall, **stage})
+    save_results(rows, "results/ml_pipeline")
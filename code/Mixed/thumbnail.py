@@ -0,0 +1,129 @@
+import concurrent.futures
+import os
+import sys
+import threading
+
+import numpy as np
+from PIL import Image
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from Executors.warm_pool import WarmPoolManager
+from Harness.benchmark import run_benchmark, print_results, save_results
+
+# Bulk thumbnailing with reduced-scale decoding and batched NumPy resizing
+#
+# process_image() in image_processing.py fully decodes every JPEG (1792x1024 for the
+# high-res images) only to shrink it to 100x100. thumbnail_batch() instead:
+# - asks the JPEG decoder for a reduced scale with Image.draft() (1/2, 1/4 or 1/8 of
+#   the size, decoded directly from the DCT coefficients); other formats are shrunk
+#   with Image.reduce() by an integer factor
+# - stacks images that decoded to the same shape into one (N, H, W, 3) array and
+#   resizes the whole stack at once with a box filter (np.add.reduceat over rows and
+#   columns), so every output pixel is the mean of the source pixels it covers
+# - hands encoding and saving to a per-process writer thread pool, so the next batch is
+#   decoded while the previous one is written
+# The decoded image is kept at least DRAFT_MARGIN times the target size so the box
+# filter still averages several source pixels per output pixel.
+
+SIZE = (100, 100)
+DRAFT_MARGIN = 2
+WRITER_THREADS = 4
+
+_writer = None
+_writer_pid = None
+_writer_lock = threading.Lock()
+
+
+# writer pool of the calling process, created on first use; a forked worker does not
+# inherit the parent's writer threads, so it creates its own
+def _writer_pool():
+    global _writer, _writer_pid
+    with _writer_lock:
+        if _writer is None or _writer_pid != os.getpid():
+            _writer = concurrent.futures.ThreadPoolExecutor(max_workers=WRITER_THREADS,
+                                                            thread_name_prefix="ThumbnailWriter")
+            _writer_pid = os.getpid()
+        return _writer
+
+
+# current per-image path: full decode, PIL resize, save (as process_image() does)
+def resize_image(src, dst, size=SIZE):
+    image = Image.open(src)
+    image = image.resize(size)
+    image.save(dst)
+
+
+# decode an image at the smallest scale that is still DRAFT_MARGIN x the target size
+def decode_reduced(path, size=SIZE):
+    image = Image.open(path)
+    wanted = (size[0] * DRAFT_MARGIN, size[1] * DRAFT_MARGIN)
+    if image.format == "JPEG":
+        image.draft("RGB", wanted)
+    image = image.convert("RGB")
+    factor = min(image.width // wanted[0], image.height // wanted[1])
+    if factor > 1:
+        image = image.reduce(factor)
+    return np.asarray(image)
+
+
+# box-filter resize of a (N, H, W, C) uint8 stack to (N, height, width, C)
+def box_resize(batch, size=SIZE):
+    width, height = size
+    n, h, w, c = batch.shape
+    rows = (np.arange(height) * h) // height     # first source row of every output row
+    cols = (np.arange(width) * w) // width
+    if h < height or w < width:
+        return batch[:, rows][:, :, cols]        # upscaling: nearest neighbour
+    summed = np.add.reduceat(batch.astype(np.uint32), rows, axis=1)
+    summed = np.add.reduceat(summed, cols, axis=2)
+    counts = np.diff(np.append(rows, h))[:, None] * np.diff(np.append(cols, w))[None, :]
+    return ((summed + counts[None, :, :, None] // 2) // counts[None, :, :, None]).astype(np.uint8)
+
+
+def _save(array, dst):
+    Image.fromarray(array).save(dst)
+    return dst
+
+
+# thumbnail a batch of (src, dst) pairs; returns the output paths once they are written
+def thumbnail_batch(pairs, size=SIZE):
+    groups = {}
+    for src, dst in pairs:
+        array = decode_reduced(src, size)
+        groups.setdefault(array.shape, []).append((array, dst))
+    writer = _writer_pool()
+    writes = []
+    for items in groups.values():
+        thumbs = box_resize(np.stack([array for array, _ in items]), size)
+        writes.extend(writer.submit(_save, thumb, dst) for thumb, (_, dst) in zip(thumbs, items))
+    return [future.result() for future in writes]
+
+
+# (src, dst) pairs for every image in the folders, repeated `copies` times with unique outputs
+def make_pairs(folders, out_dir, copies=1):
+    os.makedirs(out_dir, exist_ok=True)
+    sources = [os.path.join(folder, name) for folder in folders
+               for name in sorted(os.listdir(folder))]
+    return [(src, os.path.join(out_dir, f"{i}_{os.path.basename(src)}"))
+            for i, src in enumerate(sources * copies)]
+
+
+# workload registry: per-image path vs batched thumbnailing on the same (src, dst) pairs
+def workloads(pairs, batch_size=8, size=SIZE):
+    batches = [pairs[i:i + batch_size] for i in range(0, len(pairs), batch_size)]
+    return {
+        "resize_per_image": (resize_image, [(src, dst, size) for src, dst in pairs]),
+        "thumbnail_batch": (thumbnail_batch, [(batch, size) for batch in batches], len(pairs)),
+    }
+
+
+if __name__ == "__main__":        # idiom to prevent program freeze for processes
+    pairs = make_pairs(["high-res-images"], "results/thumbnails", copies=8)
+    # warm pools with NumPy and PIL already imported; start-up is reported once per pool
+    with WarmPoolManager(("numpy", "PIL.Image")) as manager:
+        results = run_benchmark(workloads(pairs),
+                                (concurrent.futures.ThreadPoolExecutor, concurrent.futures.ProcessPoolExecutor),
+                                pool_sizes=(2, 4), repeats=5, warmup=1, monitor_interval=0.05,
+                                pool_manager=manager)
+    print_results(results)
+    save_results(results, "results/thumbnail")
@@ -0,0 +1,324 @@
+'''
+Thread pool with a pluggable work queue.
+
+``queue.ipynb`` only simulates scheduling policies by reordering a list before
+``executor.map``. ``ScheduledExecutor`` instead keeps its own work queue and asks a
+policy object which task a free worker should run next, so the policy also applies
+to tasks submitted while the pool is already busy.
+
+Policies (pass the name or an instance as ``policy=``):
+
+- ``fifo``:        first in, first out
+- ``lifo``:        last in, first out
+- ``priority``:    heap, highest ``priority`` first (FIFO among equals)
+- ``round-robin``: one task per ``tenant`` in turn
+- ``sjf``:         shortest job first on ``cost``; tasks without a cost use the
+                   mean observed service time of the same function
+- ``aging``:       priority plus ``rate`` per second waited, so low-priority tasks
+                   cannot starve
+
+``metrics()`` reports completion time, throughput, response/wait times and Jain's
+fairness index, and ``compare_policies()`` runs the same arrival stream under
+several policies.
+'''
+import collections
+import heapq
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import Executor, Future
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from Harness.benchmark import save_results
+from Harness.stats import percentile, jain_index
+
+
+class Task:
+    __slots__ = ("future", "fn", "args", "kwargs", "priority", "tenant", "cost", "seq",
+                 "submitted", "started", "finished")
+
+    def __init__(self, future, fn, args, kwargs, priority, tenant, cost, seq):
+        self.future = future
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.tenant = tenant
+        self.cost = cost
+        self.seq = seq
+        self.submitted = time.perf_counter()
+        self.started = None
+        self.finished = None
+
+
+class FIFOPolicy:
+    name = "fifo"
+
+    def __init__(self):
+        self._queue = collections.deque()
+
+    def push(self, task):
+        self._queue.append(task)
+
+    def pop(self, now):
+        return self._queue.popleft()
+
+    def __len__(self):
+        return len(self._queue)
+
+
+class LIFOPolicy(FIFOPolicy):
+    name = "lifo"
+
+    def pop(self, now):
+        return self._queue.pop()
+
+
+class PriorityPolicy:
+    name = "priority"
+
+    def __init__(self):
+        self._heap = []
+
+    def push(self, task):
+        heapq.heappush(self._heap, (-task.priority, task.seq, task))
+
+    def pop(self, now):
+        return heapq.heappop(self._heap)[-1]
+
+    def __len__(self):
+        return len(self._heap)
+
+
+class ShortestJobFirstPolicy(PriorityPolicy):
+    name = "sjf"
+
+    def push(self, task):
+        heapq.heappush(self._heap, (task.cost, task.seq, task))
+
+
+class RoundRobinPolicy:
+    name = "round-robin"
+
+    def __init__(self):
+        self._queues = {}
+        self._turn = collections.deque()   # tenants with queued work, in serving order
+        self._size = 0
+
+    def push(self, task):
+        if task.tenant not in self._queues:
+            self._queues[task.tenant] = collections.deque()
+        if not self._queues[task.tenant]:
+            self._turn.append(task.tenant)
+        self._queues[task.tenant].append(task)
+        self._size += 1
+
+    def pop(self, now):
+        tenant = self._turn.popleft()
+        tasks = self._queues[tenant]
+        task = tasks.popleft()
+        if tasks:
+            self._turn.append(tenant)
+        self._size -= 1
+        return task
+
+    def __len__(self):
+        return self._size
+
+
+class AgingPolicy:
+    name = "aging"
+
+    # rate: priority points gained per second spent waiting
+    def __init__(self, rate=1.0):
+        self.rate = rate
+        self._tasks = []
+
+    def push(self, task):
+        self._tasks.append(task)
+
+    # linear scan: effective priorities change with time, so a heap would go stale
+    def pop(self, now):
+        best = max(range(len(self._tasks)), key=lambda i: (
+            self._tasks[i].priority + self.rate * (now - self._tasks[i].submitted),
+            -self._tasks[i].seq))
+        return self._tasks.pop(best)
+
+    def __len__(self):
+        return len(self._tasks)
+
+
+POLICIES = {
+    "fifo": FIFOPolicy,
+    "lifo": LIFOPolicy,
+    "priority": PriorityPolicy,
+    "round-robin": RoundRobinPolicy,
+    "sjf": ShortestJobFirstPolicy,
+    "aging": AgingPolicy,
+}
+
+
+def make_policy(name, **options):
+    try:
+        return POLICIES[name](**options)
+    except KeyError:
+        raise ValueError(f"Unknown scheduling policy {name!r}. Use one of: {', '.join(POLICIES)}.")
+
+
+class ScheduledExecutor(Executor):
+
+    def __init__(self, max_workers=4, policy="fifo", **policy_options):
+        if max_workers <= 0:
+            raise ValueError("max_workers must be greater than 0")
+        self.policy = make_policy(policy, **policy_options) if isinstance(policy, str) else policy
+        self.tasks = []
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._service = {}                 # function name -> (total seconds, count)
+        self._shutdown = False
+        self._threads = [threading.Thread(target=self._worker, daemon=True,
+                                          name=f"ScheduledExecutor_{i}")
+                         for i in range(max_workers)]
+        for t in self._threads:
+            t.start()
+
+    # submit with scheduling attributes; plain submit() uses the defaults
+    def schedule(self, fn, args=(), kwargs=None, priority=0, tenant="default", cost=None):
+        future = Future()
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            if cost is None:
+                cost = self._estimate(fn)
+            task = Task(future, fn, args, kwargs or {}, priority, tenant, cost, next(self._seq))
+            self.tasks.append(task)
+            self.policy.push(task)
+            self._cond.notify()
+        return future
+
+    def submit(self, fn, /, *args, **kwargs):
+        return self.schedule(fn, args, kwargs)
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        with self._cond:
+            self._shutdown = True
+            if cancel_futures:
+                while len(self.policy):
+                    self.policy.pop(time.perf_counter()).future.cancel()
+            self._cond.notify_all()
+        if wait:
+            for t in self._threads:
+                t.join()
+
+    # mean observed service time of fn (caller holds the lock); 0 before the first run
+    def _estimate(self, fn):
+        total, count = self._service.get(getattr(fn, "__name__", repr(fn)), (0.0, 0))
+        return total / count if count else 0.0
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not len(self.policy) and not self._shutdown:
+                    self._cond.wait()
+                if not len(self.policy):
+                    return
+                task = self.policy.pop(time.perf_counter())
+            if not task.future.set_running_or_notify_cancel():
+                continue
+            task.started = time.perf_counter()
+            try:
+                result = task.fn(*task.args, **task.kwargs)
+            except BaseException as e:
+                task.finished = time.perf_counter()
+                task.future.set_exception(e)
+            else:
+                task.finished = time.perf_counter()
+                task.future.set_result(result)
+            with self._cond:
+                name = getattr(task.fn, "__name__", repr(task.fn))
+                total, count = self._service.get(name, (0.0, 0))
+                self._service[name] = (total + task.finished - task.started, count + 1)
+
+    # completion time, throughput, response/wait times and fairness of finished tasks
+    # fairness is Jain's index over per-tenant mean slowdown (response / service time),
+    # or over per-task slowdown when there is a single tenant
+    def metrics(self):
+        done = [t for t in self.tasks if t.finished is not None]
+        if not done:
+            return {"policy": self.policy.name, "tasks": 0}
+        completion = max(t.finished for t in done) - min(t.submitted for t in done)
+        response = [t.finished - t.submitted for t in done]
+        wait = [t.started - t.submitted for t in done]
+        slowdown = collections.defaultdict(list)
+        for t in done:
+            slowdown[t.tenant].append((t.finished - t.submitted) / max(t.finished - t.started, 1e-6))
+        if len(slowdown) > 1:
+            fairness = jain_index([1 / (sum(v) / len(v)) for v in slowdown.values()])
+        else:
+            fairness = jain_index([1 / s for v in slowdown.values() for s in v])
+        return {
+            "policy": self.policy.name,
+            "tasks": len(done),
+            "completion_time_s": completion,
+            "throughput": len(done) / completion if completion else float("nan"),
+            "response_mean_s": sum(response) / len(response),
+            "response_p95_s": percentile(response, 95),
+            "wait_mean_s": sum(wait) / len(wait),
+            "wait_max_s": max(wait),
+            "fairness_jain": fairness,
+            "tenant_response_mean_s": {
+                tenant: sum(t.finished - t.submitted for t in done if t.tenant == tenant)
+                / sum(1 for t in done if t.tenant == tenant)
+                for tenant in slowdown
+            },
+        }
+
+
+# run the same arrival stream under each policy
+# stream: list of (delay_before_submit_s, fn, args, priority, tenant, cost)
+def compare_policies(stream, policies=tuple(POLICIES), max_workers=3):
+    results = []
+    for name in policies:
+        with ScheduledExecutor(max_workers=max_workers, policy=name) as executor:
+            for delay, fn, args, priority, tenant, cost in stream:
+                if delay:
+                    time.sleep(delay)
+                executor.schedule(fn, args, priority=priority, tenant=tenant, cost=cost)
+        results.append(executor.metrics())
+    return results
+
+
+def executeTask(task):
+    priority, description, duration = task
+    time.sleep(duration)
+    return description
+
+
+# arrival stream: a heavy tenant submitting long low-priority jobs and two light
+# tenants with short, higher-priority jobs, arriving while the pool is busy
+def generate_stream(num_tasks=60, seed=0):
+    rng = random.Random(seed)
+    stream = []
+    for i in range(num_tasks):
+        tenant = rng.choices(["heavy", "light-a", "light-b"], weights=[3, 1, 1])[0]
+        if tenant == "heavy":
+            priority, duration = 1, rng.uniform(0.05, 0.15)
+        else:
+            priority, duration = rng.choice([2, 3]), rng.uniform(0.005, 0.03)
+        task = (priority, f"{tenant} task {i}", duration)
+        stream.append((rng.expovariate(100), executeTask, (task,), priority, tenant, duration))
+    return stream
+
+
+if __name__ == "__main__":
+    results = compare_policies(generate_stream(), max_workers=3)
+    print(f"{'policy':<12} {'completion':>10} {'throughput':>11} {'resp mean':>10} "
+          f"{'resp p95':>9} {'wait max':>9} {'Jain':>6}")
+    for r in results:
+        print(f"{r['policy']:<12} {r['completion_time_s']:>9.2f}s {r['throughput']:>7.2f} t/s "
+              f"{r['response_mean_s']:>9.3f}s {r['response_p95_s']:>8.3f}s "
+              f"{r['wait_max_s']:>8.3f}s {r['fairness_jain']:>6.3f}")
+    save_results(results, "results/scheduling")